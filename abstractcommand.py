@@ -1,6 +1,27 @@
+import time
+
 from abstractplayer import AbstractPlayer
+from tracing import Trace
 
 
 class AbstractCommand:
+    def __init__(self):
+        # monotonic time of receiving the command
+        self.created = time.monotonic()
+        # stages of the command on its way to the display and mpv
+        self.trace = Trace(type(self).__name__, self.created)
+
     def do(self, player: AbstractPlayer):
         raise NotImplementedError()
+
+    def isInline(self) -> bool:
+        """
+        Quick command run right away, not queued behind running commands
+        """
+        return False
+
+    def isPreempting(self) -> bool:
+        """
+        Command cancelling the running command
+        """
+        return False
@@ -1,6 +1,15 @@
 class AbstractPlayer:
-    def setVolume(self, volume):
+    def setVolume(self, volume, created: float = None):
+        """
+        :param created: monotonic time of receiving the volume from the knob
+        """
         raise NotImplementedError
 
     def handleButton(self, button: int):
         raise NotImplementedError
+
+    def switchFrom(self, source):
+        """
+        Switches to the next available source if source is selected
+        """
+        raise NotImplementedError
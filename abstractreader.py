@@ -1,13 +1,15 @@
 import logging
-from queue import Queue
 from threading import Thread, Event
 
 from abstractplayer import AbstractPlayer
+from commandqueue import CommandQueue
+from tracing import READER_QUEUE, traced
 
 # defined in arduino!
 INPUT_VOLUME_ID = b'V'
 INPUT_BUTTON_ID = b'B'
 INPUT_LOG_ID = b'L'
+INPUT_ACK_ID = b'A'
 
 
 class AbstractReader(Thread):
@@ -16,7 +18,8 @@ class AbstractReader(Thread):
         super().__init__()
         self.__event = Event()
         # command queue - contains XXXCommands
-        self.receiveQ = Queue()
+        # latest volume wins
+        self.receiveQ = CommandQueue()
         self.setDaemon(True)
 
     def stop(self):
@@ -35,7 +38,16 @@ class AbstractReader(Thread):
     def readFrame(self):
         raise NotImplementedError()
 
+    def _putCommands(self, commands: list):
+        """
+        Queue commands received together
+        """
+        for command in commands:
+            self.receiveQ.put(command)
+
     def processCommand(self, player: AbstractPlayer):
         command = self.receiveQ.get()
-        command.do(player)
+        command.trace.stamp(READER_QUEUE)
+        with traced(command.trace):
+            command.do(player)
         self.receiveQ.task_done()
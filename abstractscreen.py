@@ -1,7 +1,10 @@
 # maximum line length on display (font 2)
 from collections import deque
+from functools import lru_cache
+from itertools import islice
 
 import jsonpickle
+from typing import Tuple
 from unidecode import unidecode
 
 import globalvariables
@@ -16,14 +19,36 @@ PLAY_ICON = 1
 # to pause, i.e. showing when playing
 PAUSE_ICON = 2
 
+# number of distinct texts kept transliterated and wrapped
+TEXT_CACHE_SIZE = 256
+
 
 def chunkstring(string: str, length):
     return (string[0 + i:length + i] for i in range(0, len(string), length))
 
 
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def wrapText(msg: str, maxChars: int, maxLines: int) -> Tuple[str, ...]:
+    """
+    msg transliterated to ascii, split to maxLines trimmed lines of maxChars, padded with empty lines
+    """
+    # replacing utf-8 chars with ascii
+    msg = unidecode(msg)
+    lines = [chunk.strip() for chunk in islice(chunkstring(msg, maxChars), maxLines)]
+    # fill the remaining lines, if any
+    lines += [''] * (maxLines - len(lines))
+    return tuple(lines)
+
+
 class AbstractScreen:
+    __slots__ = ('id', '_dirty', '_msg', '_msgKey')
+
     def __init__(self, id: int):
         self.id = id
+        # fields changed since the message was packed
+        self._dirty = True
+        self._msg = None
+        self._msgKey = None
 
     def setTracks(self, tracks: int):
         raise NotImplementedError()
@@ -41,6 +66,23 @@ class AbstractScreen:
         raise NotImplementedError()
 
     def getSerialMsg(self) -> bytes:
+        """
+        Packed message, repacked only when a field changed
+        """
+        key = self._getMsgKey()
+        if self._dirty or key != self._msgKey:
+            self._msg = self._pack(key)
+            self._msgKey = key
+            self._dirty = False
+        return self._msg
+
+    def _getMsgKey(self) -> tuple:
+        """
+        Packed values not stored in the screen, e.g. icon code
+        """
+        return ()
+
+    def _pack(self, key: tuple) -> bytes:
         raise NotImplementedError()
 
     def copyFrom(self, screen: 'AbstractScreen'):
@@ -49,20 +91,13 @@ class AbstractScreen:
         pass
 
     def _setLines(self, msg: str, lines: deque, maxChars: int, maxLines: int):
-        # replacing utf-8 chars with ascii
-        msg = unidecode(msg)
-        lines.clear()
-        # split, trim, copy first maxLines to lines
-        index = 0
-        for chunk in chunkstring(msg, maxChars):
-            lines.append(chunk.strip())
-            index += 1
-            if index == maxLines:
-                break
-
-        # fill the remaining lines, if any
-        while len(lines) < maxLines:
-            lines.append('')
+        return self._replaceLines(lines, wrapText(msg, maxChars, maxLines))
+
+    def _replaceLines(self, lines: deque, newLines: Tuple[str, ...]):
+        if tuple(lines) != newLines:
+            lines.clear()
+            lines.extend(newLines)
+            self._dirty = True
         return self
 
     def toString(self) -> str:
@@ -73,7 +108,8 @@ class AbstractScreen:
     def getIconCode(self) -> int:
         if globalvariables.player is None:
             return PLAY_ICON
-        if globalvariables.player.isPaused():
+        # screens are packed in the loop thread, not waiting for mpv there
+        if globalvariables.player.isPaused(cachedOnly=True):
             return PLAY_ICON
         else:
             return PAUSE_ICON
@@ -1,49 +1,151 @@
 import logging
-from queue import Queue
-from threading import Thread, Event
+import time
+from collections import OrderedDict
 
-from typing import Union
+from typing import Union, Optional, Iterable
 
+import tracing
 from abstractscreen import AbstractScreen
+from eventloop import EventLoop
 
 
-class AbstractWriter(Thread):
-    def __init__(self):
-        # call the thread class
-        super(AbstractWriter, self).__init__()
-        self.__event = Event()
-        self.sendQ = Queue()
-        self.setDaemon(True)
+class AbstractWriter:
+    """
+    Sends items to the displaying device from the event loop thread.
+    The next item is sent only after the device has taken the previous one,
+    queued items of the same screen are merged meanwhile, only the newest one is sent.
+    Items identical to the last one sent are dropped.
+    """
+
+    def __init__(self, loop: EventLoop, idleTimeout: Optional[float] = None):
+        """
+        :param idleTimeout: handleIdle is called after this period without items, never if None
+        """
+        self._loop = loop
+        self.__idleTimeout = idleTimeout
+        # screen id -> item, in the order of the latest update
+        self.__items = OrderedDict()
+        # screen id -> traces of the commands which requested the queued item
+        self.__traces = {}
+        self.__lastItem = None
+        # the device is busy with the items sent until this time
+        self.__busyUntil = 0
+        self.__flushTimer = None
+        self.__idleTimer = None
+        self.__stopped = False
+        self.sent = 0
+        self.deduplicated = 0
+        self.superseded = 0
+
+    def start(self):
+        self.__armIdleTimer()
 
     def stop(self):
-        self.__event.set()
+        self.__stopped = True
+        for timer in (self.__flushTimer, self.__idleTimer):
+            if timer is not None:
+                timer.cancel()
 
     def stopped(self) -> bool:
-        return self.__event.isSet()
+        return self.__stopped
 
-    def run(self):
-        try:
-            while not self.stopped():
-                item = self.sendQ.get()
-                self.handleItem(item)
-                self.sendQ.task_done()
+    def _put(self, screenId: int, item: Union[str, bytes], traces: Iterable[tracing.Trace] = ()):
+        """
+        Queue the item for sending, replacing the still unsent item of the same screen
+        :param traces: stamped when the item gets written, kept also if a newer item replaces it
+        """
+        if screenId in self.__items:
+            self.superseded += 1
+            # newest goes to the end
+            del self.__items[screenId]
+        self.__items[screenId] = item
+        if traces:
+            self.__traces.setdefault(screenId, []).extend(traces)
+        if self.__flushTimer is None and not self.__stopped:
+            self.__flushTimer = self._loop.callLater(max(0, self.__busyUntil - time.monotonic()), self.__flush)
 
+    def __flush(self):
+        self.__flushTimer = None
+        if self.__stopped:
+            return
+        try:
+            while self.__items and time.monotonic() >= self.__busyUntil:
+                screenId, item = self.__items.popitem(last=False)
+                traces = self.__traces.pop(screenId, ())
+                if item == self.__lastItem:
+                    self.deduplicated += 1
+                    # the display shows the requested content already
+                    self.__stampWritten(traces)
+                    continue
+                self.__setBusy(self.handleItem(item))
+                self.__stampWritten(traces)
+                self.__lastItem = item
+                self.sent += 1
         except Exception as e:
             logging.error("Error communicating")
             logging.error(e, exc_info=True)
+        if self.__items:
+            self.__flushTimer = self._loop.callLater(max(0, self.__busyUntil - time.monotonic()), self.__flush)
+        self.__armIdleTimer()
+
+    @staticmethod
+    def __stampWritten(traces: Iterable[tracing.Trace]):
+        for trace in traces:
+            trace.stamp(tracing.DISPLAY_WRITE)
+
+    def __setBusy(self, busySecs: Optional[float]):
+        if busySecs:
+            self.__busyUntil = time.monotonic() + busySecs
 
-    def handleItem(self, item: Union[str, bytes]):
+    def __armIdleTimer(self):
+        if self.__idleTimeout is None or self.__stopped:
+            return
+        if self.__idleTimer is not None:
+            self.__idleTimer.cancel()
+        self.__idleTimer = self._loop.callLater(self.__idleTimeout, self.__onIdle)
+
+    def __onIdle(self):
+        self.__idleTimer = None
+        if self.__stopped:
+            return
+        if not self.__items:
+            try:
+                self.__setBusy(self.handleIdle())
+            except Exception as e:
+                logging.error("Error communicating")
+                logging.error(e, exc_info=True)
+        self.__armIdleTimer()
+
+    def toString(self) -> str:
+        return "frames sent %d, deduplicated %d, superseded %d" % (self.sent, self.deduplicated, self.superseded)
+
+    def handleItem(self, item: Union[str, bytes]) -> Optional[float]:
         """
         Processing item object
         Children define specific procedures
         :param item: Data type defined by respective children -
         must be same as in the output method!
+        :return: secs the device is busy with the item, None if not known
         """
         raise NotImplementedError()
 
-    def output(self, screen: 'AbstractScreen'):
+    def handleIdle(self) -> Optional[float]:
+        """
+        Called when no item arrived within the idle timeout
+        :return: secs the device is busy with data sent, None if nothing sent
+        """
+        return None
+
+    def frameAcked(self, screenId: int, version: int):
+        """
+        Displaying device acknowledged a frame. Used by children sending versioned frames
+        """
+        pass
+
+    def output(self, screen: 'AbstractScreen', traces: Iterable[tracing.Trace] = ()):
         """
         Output screen to the displaying device. Overriden in children
         :param screen: specific screen
+        :param traces: commands which requested the output
         """
         raise NotImplementedError()
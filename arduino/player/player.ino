@@ -22,6 +22,9 @@ TFT_ST7735 tft = TFT_ST7735();  // Invoke library, pins defined in User_Setup.h
 #define CD_INFO_SCR_ID 4
 #define CD_PLAYING_SCR_ID 5
 #define RADIO_SCR_ID 6
+// versioned frames, must fit python!
+#define KEYFRAME_ID 7
+#define DELTA_ID 8
 
 // current screen
 byte screenID = 0;
@@ -79,6 +82,7 @@ byte sourcesDrawn = false;
 #define OUT_VOLUME_SCR_ID 'V'
 #define OUT_BUTTON_ID 'B'
 #define OUT_LOG_ID 'L'
+#define OUT_ACK_ID 'A'
 
 
 byte icon = NO_ICON;
@@ -714,6 +718,166 @@ void switchGlobalsToCDLoading() {
   mainScreenColor = CD_COLOR;
 }
 
+/******* VERSIONED FRAMES *******/
+/*
+   Keyframe: FRAME_START KEYFRAME_ID screenID version screen_structure FRAME_END
+   Delta: FRAME_START DELTA_ID screenID baseVersion mask changed_fields FRAME_END
+   Keyframe is acknowledged with its version. Delta applies to the screen structure of baseVersion
+   and makes version baseVersion + 1. Bit i of mask marks field i.
+   String fields are sent as length + chars, without the terminating zero.
+   Delta of other baseVersion is rejected by acknowledging NO_VERSION, python sends a new keyframe.
+*/
+
+// no keyframe received yet, or the delta chain broken
+#define NO_VERSION 255
+// must fit python!
+#define VERSION_MODULO 128
+
+// field sizes of the screen structures, zero-terminated. Must fit python FMT!
+const byte errorFields[] = {FONT2_MAXCHARS + 1, FONT2_MAXCHARS + 1, FONT2_MAXCHARS + 1, 0};
+const byte volumeFields[] = {1, 1, 1, 0};
+const byte radioFields[] = {FONT4_MAXCHARS + 1, FONT4_MAXCHARS + 1, FONT2_MAXCHARS + 1, FONT2_MAXCHARS + 1, 1, 1, 0};
+const byte cdFields[] = {1, 1, 1, 0};
+const byte cdInfoFields[] = {FONT4_MAXCHARS + 1, 0};
+
+typedef union screen_data_t {
+  error_t error;
+  volume_t volume;
+  radio_t radio;
+  cd_t cd;
+  cd_info_t cdInfo;
+} screen_data_t;
+
+// screen structures of the current versions - last keyframes with deltas applied
+error_t errorKeyframe;
+error_t infoKeyframe;
+volume_t volumeKeyframe;
+radio_t radioKeyframe;
+cd_t cdKeyframe;
+cd_info_t cdInfoKeyframe;
+
+// index: screen ID
+byte screenVersions[RADIO_SCR_ID + 1] = {NO_VERSION, NO_VERSION, NO_VERSION, NO_VERSION, NO_VERSION, NO_VERSION, NO_VERSION};
+
+char* getKeyframe(byte screenID) {
+  switch (screenID) {
+    case ERROR_SCR_ID: return (char*) &errorKeyframe;
+    case INFO_SCR_ID: return (char*) &infoKeyframe;
+    case VOLUME_SCR_ID: return (char*) &volumeKeyframe;
+    case RADIO_SCR_ID: return (char*) &radioKeyframe;
+    case CD_PLAYING_SCR_ID: return (char*) &cdKeyframe;
+    case CD_INFO_SCR_ID: return (char*) &cdInfoKeyframe;
+    default: return NULL;
+  }
+}
+
+const byte* getFields(byte screenID) {
+  switch (screenID) {
+    case ERROR_SCR_ID: return errorFields;
+    case INFO_SCR_ID: return errorFields;
+    case VOLUME_SCR_ID: return volumeFields;
+    case RADIO_SCR_ID: return radioFields;
+    case CD_PLAYING_SCR_ID: return cdFields;
+    case CD_INFO_SCR_ID: return cdInfoFields;
+    default: return NULL;
+  }
+}
+
+byte getStructSize(const byte* fields) {
+  byte size = 0;
+  for (byte i = 0; fields[i] != 0; ++i)
+    size += fields[i];
+  return size;
+}
+
+void showScreenData(byte screenID, char* data) {
+  switch (screenID) {
+    case ERROR_SCR_ID: showErrorScreen(*(error_t*) data, "Error", ERROR_COLOR); break;
+    case INFO_SCR_ID: showErrorScreen(*(error_t*) data, "Info", INFO_COLOR); break;
+    case VOLUME_SCR_ID: showVolumeScreen(*(volume_t*) data); break;
+    case RADIO_SCR_ID: showRadioScreen(*(radio_t*) data); break;
+    case CD_PLAYING_SCR_ID: showCDPlayingScreen(*(cd_t*) data); break;
+    case CD_INFO_SCR_ID: showCDInfoScreen(*(cd_info_t*) data); break;
+  }
+}
+
+void sendAck(byte screenID, byte version) {
+  Serial.write(FRAME_START);
+  Serial.write(OUT_ACK_ID);
+  Serial.write(screenID);
+  Serial.write(version);
+  Serial.write(FRAME_END);
+}
+
+bool handleKeyframe() {
+  // screenID version
+  byte header[2];
+  if (Serial.readBytes(header, 2) != 2)
+    return false;
+  byte screenID = header[0];
+  char* keyframe = getKeyframe(screenID);
+  if (keyframe == NULL)
+    return false;
+  if (!readStruct(keyframe, getStructSize(getFields(screenID)))) {
+    // keyframe partially overwritten
+    screenVersions[screenID] = NO_VERSION;
+    return false;
+  }
+  screenVersions[screenID] = header[1];
+  sendAck(screenID, header[1]);
+  showScreenData(screenID, keyframe);
+  return true;
+}
+
+/**
+   Reading one delta field of size bytes to field
+*/
+bool readField(char* field, byte size) {
+  if (size == 1)
+    return Serial.readBytes(field, 1) == 1;
+  // string - length + chars
+  byte length;
+  if (Serial.readBytes(&length, 1) < 1 || length >= size)
+    return false;
+  if (Serial.readBytes(field, length) != length)
+    return false;
+  field[length] = '\0';
+  return true;
+}
+
+bool handleDelta() {
+  // screenID baseVersion mask
+  byte header[3];
+  if (Serial.readBytes(header, 3) != 3)
+    return false;
+  byte screenID = header[0];
+  const byte* fields = getFields(screenID);
+  if (fields == NULL)
+    return false;
+  screen_data_t data;
+  char* field = (char*) &data;
+  memcpy(field, getKeyframe(screenID), getStructSize(fields));
+  for (byte i = 0; fields[i] != 0; ++i) {
+    if ((header[2] & (1 << i)) && !readField(field, fields[i]))
+      return false;
+    field += fields[i];
+  }
+  byte stopFrame;
+  if (Serial.readBytes(&stopFrame, 1) < 1 || stopFrame != FRAME_END)
+    return false;
+  if (header[1] != screenVersions[screenID]) {
+    // not following our version, requesting a new keyframe
+    screenVersions[screenID] = NO_VERSION;
+    sendAck(screenID, NO_VERSION);
+    return true;
+  }
+  char* keyframe = getKeyframe(screenID);
+  memcpy(keyframe, &data, getStructSize(fields));
+  screenVersions[screenID] = (header[1] + 1) % VERSION_MODULO;
+  showScreenData(screenID, keyframe);
+  return true;
+}
+
 /************* INITIAL SCREEN ************/
 void showInitialScreen() {
   tft.setTextColor(INFO_COLOR, BACKGROUND);
@@ -728,6 +892,8 @@ bool handleCommand(byte commandID) {
     case CD_INFO_SCR_ID: return handleCDInfoScreen();
     case INFO_SCR_ID: return handleInfoScreen();
     case ERROR_SCR_ID: return handleErrorScreen();
+    case KEYFRAME_ID: return handleKeyframe();
+    case DELTA_ID: return handleDelta();
     // unknown commandID
     default: return false;
   }
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+
+# usage: python3 bench-mpvreader.py [messages]
+#
+# Microbenchmark of the mpv IPC reader thread: messages/sec of the current
+# reader compared with the original bytes-concatenating reader.
+#
+import json
+import select
+import socket
+import sys
+import threading
+import time
+
+import mpv
+
+DEFAULT_MESSAGES = 200000
+
+
+def legacyReader(self):
+    """
+    The original reader: bytes concatenation, 1024 byte reads, decoding before parsing
+    """
+    buf = b""
+    while not self._stop_event.is_set():
+        r, w, e = select.select([self._sock], [], [], 1)
+        if r:
+            b = self._sock.recv(1024)
+            if not b:
+                break
+            buf += b
+
+        newline = buf.find(b"\n")
+        while newline >= 0:
+            data = buf[:newline + 1]
+            buf = buf[newline + 1:]
+            message = json.loads(self._decodeBytes(data))
+            self._handle_message(message)
+            newline = buf.find(b"\n")
+
+
+def getTrace(count: int) -> bytes:
+    """
+    Bursts of property changes interleaved with replies and large metadata/property-list messages
+    """
+    propertyChange = json.dumps({"event": "property-change", "id": 1, "name": "time-pos", "data": 12.345})
+    reply = json.dumps({"error": "success", "data": False, "request_id": 0})
+    metadata = json.dumps({"event": "property-change", "id": 2, "name": "metadata",
+                           "data": {"icy-name": "Cesky rozhlas Vltava", "icy-title": "Žluťoučký kůň " * 20}})
+    propertyList = json.dumps({"error": "success", "data": ["property-%d" % i for i in range(1000)],
+                               "request_id": 0})
+    lines = []
+    for i in range(count):
+        if i % 1000 == 999:
+            lines.append(propertyList)
+        elif i % 100 == 99:
+            lines.append(metadata)
+        elif i % 10 == 9:
+            lines.append(reply)
+        else:
+            lines.append(propertyChange)
+    return ("\n".join(lines) + "\n").encode("utf8")
+
+
+class BenchMPV(mpv.MPVBase):
+    """
+    The reader part of MPVBase only, reading from a socketpair instead of mpv
+    """
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self.debug = False
+        self.count = 0
+        # metadata encodings of MPVBase.__init__
+        self._encoding_key = None
+        self._stream_encodings = {}
+        self._decode_failures = {}
+        # reading in its own thread
+        self._loop = None
+        self._prepare_thread()
+
+    def _handle_message(self, message):
+        self.count += 1
+
+
+def run(reader, trace: bytes) -> float:
+    readerSock, writerSock = socket.socketpair()
+    bench = BenchMPV(readerSock)
+    thread = threading.Thread(target=reader, args=(bench,))
+    start = time.perf_counter()
+    thread.start()
+    writerSock.sendall(trace)
+    writerSock.close()
+    thread.join()
+    duration = time.perf_counter() - start
+    bench._stop_thread()
+    readerSock.close()
+    return bench.count / duration
+
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MESSAGES
+    trace = getTrace(messages)
+    print("%d messages, %d bytes, json decoder %s" % (messages, len(trace), mpv._json_loads.__module__))
+    print("legacy reader:  %10.0f msgs/s" % run(legacyReader, trace))
+    print("current reader: %10.0f msgs/s" % run(BenchMPV._reader, trace))
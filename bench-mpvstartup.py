@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+
+# usage: python3 bench-mpvstartup.py [rounds]
+#
+# Startup and teardown latency of the MPV class against a stand-in mpv which
+# only serves the JSON IPC socket. When started with the IPC server option,
+# this script acts as the stand-in itself.
+#
+import json
+import os
+import socket
+import sys
+import time
+
+from config import IPC_SERVER_OPTION
+
+DEFAULT_ROUNDS = 20
+# properties the stand-in reports in property-list
+PROPERTIES = ["chapter", "chapters", "metadata", "pause", "playlist-count", "playlist-pos", "volume"]
+
+
+def serve(sockPath: str):
+    """
+    Minimal stand-in mpv: replies success to all commands until quit
+    """
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(sockPath)
+    server.listen(1)
+    conn, addr = server.accept()
+    buf = b""
+    while True:
+        data = conn.recv(4096)
+        if not data:
+            return
+        buf += data
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            command = json.loads(line.decode("utf8"))
+            reply = {"error": "success", "request_id": command.get("request_id")}
+            if command["command"][:2] == ["get_property", "property-list"]:
+                reply["data"] = PROPERTIES
+            conn.sendall(json.dumps(reply).encode("utf8") + b"\n")
+            if command["command"][0] == "quit":
+                return
+
+
+def benchmark(rounds: int):
+    from mpv import MPV
+
+    class StandInMPV(MPV):
+        def _prepare_process(self):
+            super()._prepare_process()
+            # starting this script instead of mpv
+            self.argv[0:1] = [sys.executable, os.path.abspath(__file__)]
+
+        def on_property_pause(self, pause=None):
+            pass
+
+        def on_property_chapter(self, chapter=None):
+            pass
+
+    startups = []
+    teardowns = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        mpv = StandInMPV()
+        startups.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        mpv.close()
+        teardowns.append(time.perf_counter() - start)
+    for name, values in (("startup", startups), ("teardown", teardowns)):
+        print("%-8s avg %6.1f ms  min %6.1f ms  max %6.1f ms" % (
+            name, 1000 * sum(values) / len(values), 1000 * min(values), 1000 * max(values)))
+
+
+if __name__ == "__main__":
+    if IPC_SERVER_OPTION in sys.argv:
+        serve(sys.argv[sys.argv.index(IPC_SERVER_OPTION) + 1])
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROUNDS)
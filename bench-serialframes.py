@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+
+# usage: python3 bench-serialframes.py [trace.jsonl]
+#
+# Serial bytes needed to show a metadata trace on the display: full frames vs. keyframes + delta frames.
+# The trace holds mpv IPC messages one per line, as recorded from the mpv socket:
+#   {"event": "property-change", "name": "metadata", "data": {"icy-name": "...", "icy-title": "..."}}
+#   {"event": "property-change", "name": "pause", "data": false}
+# plus volume knob turns:
+#   {"event": "volume", "data": 42}
+# Without arguments a built-in trace of a radio listening session is replayed.
+# Keyframes are acknowledged right away as by the arduino.
+#
+import json
+import sys
+
+import globalvariables
+from eventloop import EventLoop
+from radioscreen import RadioScreen
+from serialwriter import SerialWriter, KEYFRAME_ID
+from volumescreen import VolumeScreen
+
+STATIONS = ["Radio Classic", "Jazz Radio FM", "Cesky rozhlas Vltava"]
+TITLES_PER_STATION = 40
+VOLUME_TURN = range(30, 45)
+
+
+class BenchPlayer:
+    def __init__(self):
+        self.paused = False
+
+    def isPaused(self, cachedOnly: bool = False) -> bool:
+        return self.paused
+
+    def isCDInserted(self) -> bool:
+        return False
+
+
+class CountingSerial:
+    baudrate = 4800
+
+    def __init__(self):
+        # (screen ID, version) of the keyframes written, acknowledged after the write like by the reader
+        self.acks = []
+
+    def write(self, outputBytes: bytearray):
+        if outputBytes[1] == KEYFRAME_ID:
+            self.acks.append((outputBytes[2], outputBytes[3]))
+
+    def isOpen(self) -> bool:
+        return False
+
+
+def builtinTrace() -> list:
+    trace = []
+    for station in STATIONS:
+        trace.append({"event": "property-change", "name": "metadata", "data": {"icy-name": station}})
+        for i in range(TITLES_PER_STATION):
+            title = "Artist %d - Some Song Title No. %d" % (i % 7, i)
+            trace.append({"event": "property-change", "name": "metadata",
+                          "data": {"icy-name": station, "icy-title": title}})
+            if i % 10 == 3:
+                trace.append({"event": "property-change", "name": "pause", "data": True})
+                trace.append({"event": "property-change", "name": "pause", "data": False})
+            if i % 10 == 7:
+                trace += [{"event": "volume", "data": volume} for volume in VOLUME_TURN]
+    return trace
+
+
+def readTrace(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Replay:
+    def __init__(self):
+        self.player = BenchPlayer()
+        globalvariables.player = self.player
+        self.radioScreen = RadioScreen()
+        self.volumeScreen = VolumeScreen()
+        self.serial = CountingSerial()
+        self.writer = SerialWriter(self.serial, EventLoop())
+        self.updates = 0
+        self.fullBytes = 0
+        # update kind -> [updates, full frame bytes, delta frame bytes]
+        self.kinds = {}
+        self.lastItem = None
+        self.volumeShown = False
+
+    def show(self, kind: str, item: bytes):
+        self.updates += 1
+        counts = self.kinds.setdefault(kind, [0, 0, 0])
+        counts[0] += 1
+        # both variants skip repeated frames
+        if item == self.lastItem:
+            return
+        self.lastItem = item
+        self.fullBytes += len(item) + 2
+        counts[1] += len(item) + 2
+        written = self.writer.bytesWritten
+        self.writer.handleItem(item)
+        for screenId, version in self.serial.acks:
+            self.writer.frameAcked(screenId, version)
+        self.serial.acks.clear()
+        counts[2] += self.writer.bytesWritten - written
+
+    def handle(self, message: dict):
+        if message.get("event") == "volume":
+            self.volumeScreen.setVolume(message["data"])
+            self.show("volume", self.volumeScreen.getSerialMsg())
+            self.volumeShown = True
+            return
+        if self.volumeShown:
+            # volume timeout, main screen back
+            self.show("after volume", self.radioScreen.getSerialMsg())
+            self.volumeShown = False
+        name = message.get("name")
+        data = message.get("data")
+        if name == "pause" and data is not None:
+            self.player.paused = data
+            kind = "pause"
+        elif name == "metadata" and data is not None:
+            kind = "metadata"
+            if "icy-name" in data:
+                self.radioScreen.setStation(data["icy-name"])
+            if "icy-title" in data:
+                self.radioScreen.setRadioTitle(data["icy-title"])
+        else:
+            return
+        self.show(kind, self.radioScreen.getSerialMsg())
+
+
+def main():
+    trace = readTrace(sys.argv[1]) if len(sys.argv) > 1 else builtinTrace()
+    replay = Replay()
+    for message in trace:
+        replay.handle(message)
+    writer = replay.writer
+    print("%d trace messages, %d display updates" % (len(trace), replay.updates))
+    print("full frames:  %6d bytes, %.1f bytes/update" % (replay.fullBytes, replay.fullBytes / replay.updates))
+    print("delta frames: %6d bytes, %.1f bytes/update (%d keyframes, %d deltas)" % (
+        writer.bytesWritten, writer.bytesWritten / replay.updates, writer.keyframes, writer.deltas))
+    print("reduction %.1fx" % (replay.fullBytes / writer.bytesWritten))
+    for kind, (updates, fullBytes, deltaBytes) in replay.kinds.items():
+        print("  %-12s %4d updates, full %.1f, delta %.1f bytes/update" % (
+            kind, updates, fullBytes / updates, deltaBytes / updates))
+
+
+if __name__ == "__main__":
+    main()
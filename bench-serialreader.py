@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+
+# usage: python3 bench-serialreader.py [frames]
+#
+# Reading arduino frames over a pty pair: legacy byte-by-byte reads vs. buffered FrameParser.
+# Volume, button and log frames are written at full speed with random noise injected between them.
+#
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tty
+from queue import Queue
+
+import serial
+
+from abstractreader import AbstractReader, INPUT_VOLUME_ID, INPUT_BUTTON_ID, INPUT_LOG_ID
+from buttoncommand import ButtonCommand
+from frameparser import FRAME_START, FRAME_STOP
+from serialreader import SerialReader
+from volumecommand import VolumeCommand
+
+DEFAULT_FRAMES = 20000
+NOISE_PROBABILITY = 0.05
+# last frame, all bytes before it consumed
+SENTINEL_BUTTON = 250
+
+
+class LegacySerialReader(SerialReader):
+    """
+    Reading byte by byte, as before FrameParser
+    """
+
+    def __init__(self, ser: serial.Serial):
+        super().__init__(ser)
+        self.ser = ser
+
+    def readFrame(self):
+        frameStart = self.ser.read(1)
+        if frameStart[0] == FRAME_START:
+            frameType = self.ser.read(1)
+            if frameType == INPUT_VOLUME_ID:
+                self.__readCommand(VolumeCommand)
+            if frameType == INPUT_BUTTON_ID:
+                self.__readCommand(ButtonCommand)
+            if frameType == INPUT_LOG_ID:
+                self.__readLog()
+        else:
+            logging.warning("Skipping unknown FRAME_START: " + str(frameStart[0]))
+
+    def __readCommand(self, commandClass):
+        value = self.ser.read(1)
+        frameStop = self.ser.read(1)
+        if frameStop[0] == FRAME_STOP:
+            self.receiveQ.put(commandClass(value[0]))
+        else:
+            logging.warning("Skipping unknown FRAME_STOP: " + str(frameStop[0]))
+
+    def __readLog(self):
+        count = 0
+        msg = ''
+        while True:
+            character = self.ser.read(1)
+            if character[0] == FRAME_STOP:
+                break
+            count += 1
+            if count > 100:
+                return
+            try:
+                msg += character.decode('utf-8')
+            except Exception:
+                return
+        logging.debug("Arduino log: " + msg)
+
+
+def generateStream(frames: int) -> (bytes, int):
+    """
+    :return: stream and number of volume and button frames in it, without the sentinel
+    """
+    rnd = random.Random(1)
+    stream = bytearray()
+    commandFrames = 0
+    for i in range(frames):
+        if rnd.random() < NOISE_PROBABILITY:
+            stream.extend(rnd.randrange(256) for _ in range(rnd.randint(1, 8)))
+        kind = rnd.random()
+        if kind < 0.6:
+            stream.extend((FRAME_START, INPUT_VOLUME_ID[0], rnd.randint(0, 99), FRAME_STOP))
+            commandFrames += 1
+        elif kind < 0.8:
+            stream.extend((FRAME_START, INPUT_BUTTON_ID[0], rnd.randint(1, 4), FRAME_STOP))
+            commandFrames += 1
+        else:
+            stream.extend((FRAME_START, INPUT_LOG_ID[0]))
+            stream.extend(("log message %d" % i).encode())
+            stream.append(FRAME_STOP)
+    # padding lets the legacy reader resynchronize before the sentinel
+    stream.extend(bytes(16))
+    stream.extend((FRAME_START, INPUT_BUTTON_ID[0], SENTINEL_BUTTON, FRAME_STOP))
+    return bytes(stream), commandFrames
+
+
+def run(readerClass, stream: bytes, commandFrames: int) -> None:
+    master, slave = os.openpty()
+    tty.setraw(master)
+    ser = serial.Serial(os.ttyname(slave), timeout=None)
+    reader = readerClass(ser)
+    # every parsed frame counted, the player's queue would coalesce the volume commands
+    reader.receiveQ = Queue()
+    reader.start()
+    start = time.monotonic()
+    writer = threading.Thread(target=lambda: os.write(master, stream), daemon=True)
+    writer.start()
+    commands = 0
+    while True:
+        command = reader.receiveQ.get()
+        if isinstance(command, ButtonCommand) and command.getButton() == SENTINEL_BUTTON:
+            break
+        commands += 1
+    elapsed = time.monotonic() - start
+    print("%-20s %6d/%d commands in %.3fs, %.0f bytes/s" % (
+        readerClass.__name__, commands, commandFrames, elapsed, len(stream) / elapsed))
+    # only the stop flag, SerialReader.stop closes the port too
+    AbstractReader.stop(reader)
+    # waking up the blocked read, the reader thread ends on the flag
+    os.write(master, bytes(1))
+    reader.join()
+    reader.stop()
+    os.close(master)
+
+
+def main():
+    logging.basicConfig(level=logging.ERROR)
+    stream, commandFrames = generateStream(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FRAMES)
+    print("%d bytes, line rate at 4800 baud: %d bytes/s" % (len(stream), 4800 // 10))
+    run(LegacySerialReader, stream, commandFrames)
+    run(SerialReader, stream, commandFrames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+
+# usage: python3 bench-stationprober.py [stations]
+#
+# Probes stations served by a local HTTP stand-in server: flowing HTTP and ICY
+# (shoutcast) streams, redirects, 404s, streams sending headers only, stalled
+# servers and closed ports. Checks the probe results, the result cache
+# persisted in a temporary state dir and compares the pool with probing one
+# by one.
+#
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import stationprober
+from stationprober import StationProber, probeStream, ProbeError
+
+DEFAULT_STATIONS = 20
+# stand-in path -> expected alive
+KINDS = {"/http": True, "/icy": True, "/redirect": True, "/missing": False, "/silent": False, "/stalled": False}
+# stalled servers are given up after
+TIMEOUT_SECS = 0.5
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        kind = "/" + self.path.split("/")[1]
+        if kind == "/http":
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.end_headers()
+            self.__stream()
+        elif kind == "/icy":
+            self.wfile.write(b"ICY 200 OK\r\nicy-name: Stand-in\r\nicy-metaint: 16000\r\n\r\n")
+            self.__stream()
+        elif kind == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/http" + self.path[len(kind):])
+            self.end_headers()
+        elif kind == "/silent":
+            self.send_response(200)
+            self.end_headers()
+        elif kind == "/stalled":
+            time.sleep(TIMEOUT_SECS * 2)
+        else:
+            self.send_error(404)
+
+    def __stream(self):
+        try:
+            for i in range(4):
+                self.wfile.write(b"\xff" * 1024)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def closedPortUrl() -> str:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return "http://127.0.0.1:%d/closed" % port
+
+
+def stationUrls(base: str, count: int) -> dict:
+    urls = {closedPortUrl(): False}
+    kinds = list(KINDS)
+    for i in range(count - 1):
+        kind = kinds[i % len(kinds)]
+        urls["%s%s/%d" % (base, kind, i)] = KINDS[kind]
+    return urls
+
+
+def waitForProbes(prober: StationProber, count: int):
+    deadline = time.monotonic() + 30
+    while prober.probes < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def run(count: int):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = stationUrls("http://127.0.0.1:%d" % server.server_port, count)
+    stationprober.PROBE_TIMEOUT_SECS = TIMEOUT_SECS
+
+    start = time.monotonic()
+    for url in urls:
+        try:
+            probeStream(url)
+        except ProbeError:
+            pass
+    sequential = time.monotonic() - start
+
+    stateDir = tempfile.mkdtemp(prefix="bench-stationprober.")
+    prober = StationProber(stateDir)
+    start = time.monotonic()
+    prober.probe(urls)
+    waitForProbes(prober, len(urls))
+    pooled = time.monotonic() - start
+    wrong = [url for url, alive in urls.items() if prober.isDead(url) == alive]
+    prober.close()
+    print("%d stations: one by one %.2fs, pool of %d %.2fs, wrong results %d %s" % (
+        len(urls), sequential, stationprober.PROBE_WORKERS, pooled, len(wrong), wrong))
+
+    # results survive the restart, nothing gets probed again
+    prober = StationProber(stateDir)
+    prober.probe(urls)
+    time.sleep(0.1)
+    wrong = [url for url, alive in urls.items() if prober.isDead(url) == alive]
+    print("after restart: probes %d, wrong results %d, cache file %s" % (
+        prober.probes, len(wrong), os.path.join(stateDir, stationprober.PROBE_FILENAME)))
+    prober.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_STATIONS)
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+
+# usage: python3 bench-streamsupervisor.py [faults]
+#
+# Time to recover of the radio stream supervisor from injected faults, against
+# fakempv.py: stream drops (end-file error), cache stalls longer than the stall
+# window and drops with failing reconnects (backoff). Uses the in-memory
+# stand-ins of loadtest.py.
+#
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import globalvariables
+import loadtest
+import mpv
+import player
+import statefile
+import streamsupervisor
+from display import Display
+from networkinfo import NetworkInfo
+
+DEFAULT_FAULTS = 9
+STALL_WINDOW_SECS = 1
+CONNECT_SECS = 0.2
+# waiting for the recovery after a fault
+RECOVERY_TIMEOUT_SECS = 20
+
+
+def injectFault(mpvInstance, fault: int):
+    kind = fault % 3
+    if kind == 0:
+        mpvInstance.command("fake-end-file", "error")
+    elif kind == 1:
+        mpvInstance.command("fake-stall", STALL_WINDOW_SECS * 3)
+    else:
+        mpvInstance.command("fake-fail", 2)
+        mpvInstance.command("fake-end-file", "error")
+
+
+def run(faults: int):
+    tmpDir = tempfile.mkdtemp(prefix="bench-streamsupervisor.")
+    os.environ["FAKEMPV_CONNECT_SECS"] = str(CONNECT_SECS)
+    mpv.MPVBase.executable = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakempv.py")
+    statefile.STATE_DIR = tmpDir
+    streamsupervisor.STREAM_STALL_WINDOW_SECS = STALL_WINDOW_SECS
+    streamsupervisor.BACKOFF_BASE_SECS = 0.5
+    playlistPath = loadtest.writePlaylist(tmpDir)
+    player.ExtConfig = lambda: loadtest.LoadTestExtConfig(playlistPath)
+    player.Mixer = loadtest.LoadTestMixer
+    player.getNetworkInfo = lambda: NetworkInfo("bench", "127.0.0.1", None, None)
+    display = Display()
+    globalvariables.player = player.Player(display)
+    radio = globalvariables.player.getSelectedSource()
+    stats = radio.getRecoveryStats()
+    # the stream plays first
+    time.sleep(CONNECT_SECS * 3)
+    for fault in range(faults):
+        count = stats.getCount()
+        injectFault(globalvariables.player.getMPV(), fault)
+        deadline = time.monotonic() + RECOVERY_TIMEOUT_SECS
+        while stats.getCount() == count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if stats.getCount() == count:
+            print("fault %d not recovered" % fault)
+        time.sleep(CONNECT_SECS)
+    print(stats.toString())
+    globalvariables.player.close()
+    display.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s:%(message)s')
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FAULTS)
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+
+# usage: python3 bench-zapping.py [switches]
+#
+# Station switch to audio start (core-idle false) of the radio with and without
+# the zap mode, against fakempv.py simulating FAKEMPV_CONNECT_SECS stream
+# connection delay. Uses the in-memory stand-ins of loadtest.py.
+#
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import globalvariables
+import loadtest
+import mpv
+import player
+import radiosource
+import statefile
+from buttoncommand import B3, B4
+from display import Display
+from eventloop import EventLoop
+from networkinfo import NetworkInfo
+
+DEFAULT_SWITCHES = 20
+CONNECT_SECS = 0.5
+# waiting for the audio after a switch
+SWITCH_TIMEOUT_SECS = 5
+
+
+def measure(zapMode: bool, switches: int, display: Display):
+    radiosource.RADIO_ZAP_MODE = zapMode
+    globalvariables.player = player.Player(display)
+    radio = globalvariables.player.getSelectedSource()
+    stats = radio.getSwitchStats()
+    for i in range(switches):
+        count = stats.getCount()
+        globalvariables.player.handleButton(B3 if i % 4 != 3 else B4)
+        deadline = time.monotonic() + SWITCH_TIMEOUT_SECS
+        while stats.getCount() == count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # time to listen, the neighbours get prebuffered meanwhile
+        time.sleep(CONNECT_SECS * 2)
+    print(("zap mode:  " if zapMode else "plain:     ") + stats.toString())
+    print("           " + loadtest.getProcessStats())
+    globalvariables.player.close()
+
+
+def run(switches: int):
+    tmpDir = tempfile.mkdtemp(prefix="bench-zapping.")
+    os.environ["FAKEMPV_CONNECT_SECS"] = str(CONNECT_SECS)
+    mpv.MPVBase.executable = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakempv.py")
+    statefile.STATE_DIR = tmpDir
+    playlistPath = loadtest.writePlaylist(tmpDir)
+    player.ExtConfig = lambda: loadtest.LoadTestExtConfig(playlistPath)
+    player.Mixer = loadtest.LoadTestMixer
+    player.getNetworkInfo = lambda: NetworkInfo("bench", "127.0.0.1", None, None)
+    # the loop of control.py
+    globalvariables.loop = EventLoop()
+    globalvariables.loop.start()
+    display = Display()
+    for zapMode in (False, True):
+        measure(zapMode, switches, display)
+    globalvariables.loop.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s:%(message)s')
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SWITCHES)
@@ -15,9 +15,19 @@ B6 = 6
 B7 = 7
 B8 = 8
 
+# source switch and next/prev replace whatever the running command does
+PREEMPTING_BUTTONS = (B1, B5, B3, B4, B7, B8)
+
 class ButtonCommand(AbstractCommand):
     def __init__(self, button: int):
+        super().__init__()
         self.__button = button
 
+    def getButton(self) -> int:
+        return self.__button
+
     def do(self, player: AbstractPlayer):
         player.handleButton(self.__button)
+
+    def isPreempting(self) -> bool:
+        return self.__button in PREEMPTING_BUTTONS
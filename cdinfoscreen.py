@@ -1,19 +1,25 @@
-from struct import pack
+from struct import Struct
 
 from abstractscreen import AbstractScreen, FONT4_MAXCHARS
 
 ID = 4
 # ID
 FMT = 'b' + ' ' + str(FONT4_MAXCHARS + 1) + 's'
+STRUCT = Struct(FMT)
 
 
 class CDInfoScreen(AbstractScreen):
+    __slots__ = ('text',)
+
     def __init__(self):
         super().__init__(ID)
         self.text = ""
 
     def setText(self, text: str):
-        self.text = text[0:FONT4_MAXCHARS]
+        text = text[0:FONT4_MAXCHARS]
+        if text != self.text:
+            self.text = text
+            self._dirty = True
 
-    def getSerialMsg(self) -> bytes:
-        return pack(FMT, self.id, bytes(self.text, 'utf-8'))
+    def _pack(self, key: tuple) -> bytes:
+        return STRUCT.pack(self.id, bytes(self.text, 'utf-8'))
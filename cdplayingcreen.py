@@ -1,23 +1,33 @@
-from struct import pack
+from struct import Struct
 
 from abstractscreen import AbstractScreen
 
 ID = 5
 # ID trackNb tracks playback-icon
 FMT = 'b b b b'
+STRUCT = Struct(FMT)
 
 
 class CDPlayingScreen(AbstractScreen):
+    __slots__ = ('trackNb', 'tracks')
+
     def __init__(self):
         super().__init__(ID)
         self.trackNb = 0
         self.tracks = 0
 
     def setTracks(self, tracks: int):
-        self.tracks = tracks
+        if tracks != self.tracks:
+            self.tracks = tracks
+            self._dirty = True
 
     def setTrackNb(self, trackNb: int):
-        self.trackNb = trackNb
+        if trackNb != self.trackNb:
+            self.trackNb = trackNb
+            self._dirty = True
+
+    def _getMsgKey(self) -> tuple:
+        return self.getIconCode(),
 
-    def getSerialMsg(self) -> bytes:
-        return pack(FMT, self.id, self.trackNb, self.tracks, self.getIconCode())
+    def _pack(self, key: tuple) -> bytes:
+        return STRUCT.pack(self.id, self.trackNb, self.tracks, *key)
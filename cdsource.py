@@ -1,5 +1,4 @@
 import logging
-import time
 from alsaaudio import Mixer
 
 import pyudev
@@ -7,11 +6,14 @@ from pyudev import Devices
 from pyudev import Monitor
 from pyudev import MonitorObserver
 
+import globalvariables
+from commandexecutor import cancellableSleep
 from config import DEV_CDROM
 from display import Display
 from extconfig import ExtConfig
 from mpv import MPVCommandError
 from mpvsource import MPVSource
+from sourceswitchcommand import SourceSwitchCommand
 from statefile import StateFile
 
 
@@ -25,8 +27,20 @@ class CDSource(MPVSource):
         context = pyudev.Context()
         monitor = Monitor.from_netlink(context)
         monitor.filter_by(subsystem='block')
-        observer = MonitorObserver(monitor, callback=self.__checkUdevEvent, name='monitor-observer')
-        observer.start()
+        if globalvariables.loop is not None:
+            # the netlink socket is watched by the event loop
+            monitor.start()
+            globalvariables.loop.addReader(monitor.fileno(), lambda: self.__readUdevEvents(monitor))
+        else:
+            observer = MonitorObserver(monitor, callback=self.__checkUdevEvent, name='monitor-observer')
+            observer.start()
+
+    def __readUdevEvents(self, monitor: Monitor):
+        # taking all events received, not blocking
+        device = monitor.poll(timeout=0)
+        while device is not None:
+            self.__checkUdevEvent(device)
+            device = monitor.poll(timeout=0)
 
     def __checkUdevEvent(self, device: dict):
         if DISK_EJECT_REQUEST_UDEV_TAG in device:
@@ -48,10 +62,12 @@ class CDSource(MPVSource):
 
     def _start(self) -> None:
         self.__cdIsOver = False
-        self._player.restartMPV()
-        mpv = self._player.getMPV()
+        mpv = self._resetMPV()
         mpv.command("loadfile", CD_FILENAME)
 
+    def _getMPVOptions(self) -> dict:
+        return CD_MPV_OPTIONS
+
     def next(self) -> None:
         self.__nextCDTrack()
 
@@ -73,12 +89,12 @@ class CDSource(MPVSource):
         waitTimer = 0
         while tracks is None and waitTimer < CD_READ_TRIES:
             try:
-                tracks = self._player.getMPV().get_property("chapters")
-                trackNb = self._player.getMPV().get_property("chapter")
+                tracks = self._player.getMPV().getCachedProperty("chapters")
+                trackNb = self._player.getMPV().getCachedProperty("chapter")
             except MPVCommandError:
                 # we have to wait a bit
                 waitTimer += 1
-                time.sleep(1)
+                cancellableSleep(1)
         if (tracks is None) or (trackNb is None):
             logging.warning("Cannot read CD even after %d tries, no more trying", CD_READ_TRIES)
             raise CDError("cannot read CD")
@@ -127,15 +143,16 @@ class CDSource(MPVSource):
             self._display.showCDInfo("End of CD")
         else:
             trackNb, tracks = self.__readCDFromMPV()
-            self._display.setCDPlayingScreen()
-            self._display.getScreen().setTrackNb(trackNb + 1)
-            self._display.getScreen().setTracks(tracks)
-            self._display.showScreen()
+            self._display.showCDTracks(trackNb + 1, tracks)
 
     def __cdWasRemoved(self):
         self._cdIsInserted = False
         if self._isActive:
-            self._player.switch()
+            if globalvariables.executor is not None:
+                # runs in the loop thread, the switch with its mpv IPC is left to the command thread
+                globalvariables.executor.submit(SourceSwitchCommand(self))
+            else:
+                self._player.switchFrom(self)
         else:
             self._display.showScreen()
 
@@ -146,6 +163,11 @@ class CDSource(MPVSource):
 
 CD_FILENAME = "cdda://"
 CD_READ_TRIES = 20
+CD_MPV_OPTIONS = {
+    "cdda-speed": "1",
+    # trial/error - some CDDA media need this
+    "cdda-toc-bias": "1",
+}
 
 
 class CDError(Exception):
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from abstractcommand import AbstractCommand
+from abstractplayer import AbstractPlayer
+from latencystats import LatencyStats
+from tracing import READER_QUEUE, traced
+
+# cancellation event of the command running in the current thread
+_running = threading.local()
+
+
+class CommandCancelled(Exception):
+    pass
+
+
+def checkCancelled():
+    """
+    Raises CommandCancelled if the command running in this thread was cancelled.
+    No-op outside of the executor thread
+    """
+    cancelled = getattr(_running, "cancelled", None)
+    if cancelled is not None and cancelled.is_set():
+        raise CommandCancelled()
+
+
+def cancellableSleep(secs: float):
+    """
+    time.sleep interrupted by cancelling the command running in this thread
+    """
+    cancelled = getattr(_running, "cancelled", None)
+    if cancelled is None:
+        time.sleep(secs)
+    elif cancelled.wait(secs):
+        raise CommandCancelled()
+
+
+class CommandExecutor:
+    """
+    Runs commands in a worker thread, in order.
+    Inline commands (volume) run right away in the submitting thread.
+    A preempting command (source switch, next/prev) cancels the running command,
+    long-running source actions check for cancellation via checkCancelled/cancellableSleep.
+    """
+
+    def __init__(self, player: AbstractPlayer):
+        self.__player = player
+        self.__queue = deque()
+        self.__lock = threading.Lock()
+        # commands are taken and their cancellation event published in one step under the lock
+        self.__condition = threading.Condition(self.__lock)
+        # cancellation event of the running command
+        self.__cancelled = None
+        # command type -> (queue wait stats, execution stats)
+        self.__stats = {}
+        self.cancelledCount = 0
+        self.__thread = threading.Thread(target=self.__run, name="commands")
+        self.__thread.setDaemon(True)
+
+    def start(self):
+        self.__thread.start()
+
+    def stop(self):
+        self.cancelRunning()
+        self.__enqueue(None)
+        if self.__thread.is_alive():
+            self.__thread.join()
+
+    def submit(self, command: AbstractCommand):
+        command.trace.stamp(READER_QUEUE)
+        if command.isInline():
+            self.__execute(command)
+            return
+        if command.isPreempting():
+            self.cancelRunning()
+        self.__enqueue(command)
+
+    def __enqueue(self, command):
+        with self.__condition:
+            self.__queue.append(command)
+            self.__condition.notify()
+
+    def cancelRunning(self):
+        with self.__lock:
+            if self.__cancelled is not None:
+                self.__cancelled.set()
+
+    def __run(self):
+        while True:
+            cancelled = threading.Event()
+            with self.__condition:
+                while not self.__queue:
+                    self.__condition.wait()
+                command = self.__queue.popleft()
+                # cancelRunning from now on reaches this command
+                self.__cancelled = cancelled
+            if command is None:
+                return
+            _running.cancelled = cancelled
+            try:
+                self.__execute(command)
+            except CommandCancelled:
+                self.cancelledCount += 1
+                logging.debug("%s cancelled", type(command).__name__)
+            finally:
+                _running.cancelled = None
+                with self.__lock:
+                    self.__cancelled = None
+
+    def __execute(self, command: AbstractCommand):
+        waitStats, execStats = self.__getStats(type(command).__name__)
+        start = time.monotonic()
+        waitStats.add(start - command.created)
+        try:
+            with traced(command.trace):
+                command.do(self.__player)
+        except CommandCancelled:
+            raise
+        except Exception as e:
+            logging.error(e, exc_info=True)
+        finally:
+            execStats.add(time.monotonic() - start)
+
+    def __getStats(self, name: str):
+        with self.__lock:
+            stats = self.__stats.get(name)
+            if stats is None:
+                stats = (LatencyStats(name + " queue wait"), LatencyStats(name + " execution"))
+                self.__stats[name] = stats
+            return stats
+
+    def toString(self) -> str:
+        with self.__lock:
+            stats = list(self.__stats.values())
+        lines = ["commands cancelled %d" % self.cancelledCount]
+        for waitStats, execStats in stats:
+            lines += [waitStats.toString(), execStats.toString()]
+        return "\n".join(lines)
@@ -0,0 +1,28 @@
+from queue import Queue
+
+from volumecommand import VolumeCommand
+
+
+class CommandQueue(Queue):
+    """
+    Queue of received commands. A queued volume command is replaced by a newer one (latest wins),
+    keeping its place and receiving time. Other commands keep their order.
+    """
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.coalesced = 0
+
+    def _put(self, command):
+        if isinstance(command, VolumeCommand):
+            for index, queued in enumerate(self.queue):
+                if isinstance(queued, VolumeCommand):
+                    # knob latency is measured from the first of the coalesced turns
+                    command.created = queued.created
+                    command.trace = queued.trace
+                    self.queue[index] = command
+                    self.coalesced += 1
+                    # put counts the command as a new unfinished task
+                    self.unfinished_tasks -= 1
+                    return
+        self.queue.append(command)
@@ -12,12 +12,27 @@ AUDIO_DEV = "alsa/plughw:CARD=PCH,DEV=0"
 FLASH_LABEL = "RADIO"
 PLAYLIST_FILENAME = "playlist.m3u"
 
+# tracks queued ahead in mpv playlist when playing a flash directory, 0 = the whole directory at once
+FLASH_PLAYLIST_WINDOW = 10
+
+# radio zap mode: standby mpv instances keep the neighbouring stations prebuffered for instant switching,
+# costs one mpv process and stream connection per neighbour
+RADIO_ZAP_MODE = False
+
+# radio streams are checked in the background, next/prev skip the stations found dead
+RADIO_SKIP_DEAD_STATIONS = False
+
+# a radio stream not playing for this long (stalled, cache underrun) gets reconnected, with growing backoff
+STREAM_STALL_WINDOW_SECS = 5
+
 # state file
 STATE_DIR = "/var/lib/radio"
 STATE_FILENAME = "radio.state"
 
 IPC_SERVER_OPTION = "--input-ipc-server"
 VOLUME_PROPERTY = "volume"
+# mpv properties mirrored locally in addition to those with callbacks
+MPV_CACHED_PROPERTIES = ["chapters", "path"]
 
 DST_IFS_DIR = "/tmp/interfaces.d"
 
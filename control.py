@@ -11,12 +11,16 @@
 import logging
 import signal
 import sys
+import threading
 
 import serial
 
 import globalvariables
+import tracing
+from commandexecutor import CommandExecutor
 from config import SERIAL_PORT, BAUDRATE, USE_SERIAL, LOG_FILE
 from display import Display
+from eventloop import EventLoop
 from inputreader import InputReader
 from player import Player
 from serialreader import SerialReader
@@ -27,7 +31,7 @@ def getSerial() -> serial.Serial:
     ser = serial.Serial(
         port=SERIAL_PORT,
         baudrate=BAUDRATE,
-        # blocking reading, since read in separate thread serialreader
+        # blocking reading, the event loop reads only when data are waiting
         timeout=None,
         dsrdtr=False,
         xonxoff=False,
@@ -47,16 +51,42 @@ def exitHandler(signum, frame):
     exitCleanly(0)
 
 
+# set by SIGUSR1
+dumpRequested = threading.Event()
+
+
+def dumpHandler(signum, frame):
+    # kill -USR1 <pid> logs the latencies of the commands passing the stages.
+    # The handler interrupts the main thread, possibly holding the stats locks, the dump runs in its own thread
+    dumpRequested.set()
+
+
+def dumpStats():
+    while True:
+        dumpRequested.wait()
+        dumpRequested.clear()
+        logging.info("Command stage latencies:\n" + tracing.toString())
+        if executor is not None:
+            logging.info(executor.toString())
+
+
 def exitCleanly(exitValue: int):
     global player
+    if executor is not None:
+        logging.debug(executor.toString())
+        executor.stop()
     if player is not None:
         player.close()
     if reader is not None:
+        logging.debug("Volume commands coalesced: " + str(reader.receiveQ.coalesced))
         reader.stop()
-        # the writer thread locks up at joining, therefore the timeout has to be specified
-        reader.join(0.1)
+        if reader.is_alive():
+            # the reader thread locks up at joining, therefore the timeout has to be specified
+            reader.join(0.1)
     if ser is not None:
         ser.close()
+    if globalvariables.loop is not None:
+        globalvariables.loop.stop()
     sys.exit(exitValue)
 
 
@@ -64,28 +94,44 @@ if __name__ == "__main__":
     logging.basicConfig(filename=LOG_FILE, level=logging.DEBUG, format='%(asctime)s %(levelname)s:%(message)s')
     ser = None
     reader = None
+    executor = None
     signal.signal(signal.SIGINT, exitHandler)
     signal.signal(signal.SIGTERM, exitHandler)
+    signal.signal(signal.SIGUSR1, dumpHandler)
+    dumpThread = threading.Thread(target=dumpStats, name="stats-dump")
+    dumpThread.setDaemon(True)
+    dumpThread.start()
     global player
     try:
         reader = None
         display = None
+        # serial port, udev monitor, mpv sockets with their events and display timers are handled in one loop thread
+        globalvariables.loop = EventLoop()
+        globalvariables.loop.start()
         if (USE_SERIAL):
             ser = getSerial()
             serial.time.sleep(2)
             reader = SerialReader(ser)
             display = Display(ser)
+            reader.setAckHandler(display.frameAcked)
+            reader.attach(globalvariables.loop)
         else:
             reader = InputReader()
             display = Display()
+            reader.start()
 
-        reader.start()
         # Open the video player and load a file.
         globalvariables.player = Player(display)
 
+        # button commands run in the executor thread, volume right away
+        executor = CommandExecutor(globalvariables.player)
+        executor.start()
+        globalvariables.executor = executor
         while True:
             global player
-            reader.processCommand(globalvariables.player)
+            command = reader.receiveQ.get()
+            executor.submit(command)
+            reader.receiveQ.task_done()
     except Exception as e:
         logging.error(e, exc_info=True)
         exitCleanly(1)
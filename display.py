@@ -1,10 +1,15 @@
-import time
-from threading import Timer
+import logging
 
+from typing import Tuple
+
+import globalvariables
+import tracing
 from abstractscreen import AbstractScreen
 from cdinfoscreen import CDInfoScreen
 from cdplayingcreen import CDPlayingScreen
+from displayscheduler import DisplayScheduler
 from errorscreen import ErrorScreen
+from eventloop import EventLoop
 from infoscreen import InfoScreen
 from outputwriter import OutputWriter
 from radioscreen import RadioScreen
@@ -13,6 +18,17 @@ from volumescreen import VolumeScreen
 
 VOL_TIMEOUT = 1
 
+# priority classes of display outputs, lower goes first
+OVERLAY_PRIORITY = 0
+MAIN_PRIORITY = 1
+# minimum secs between two outputs of a priority class, protects the serial link
+MIN_OUTPUT_INTERVALS = {OVERLAY_PRIORITY: 0.05, MAIN_PRIORITY: 0.1}
+
+# scheduled actions
+MAIN_SCREEN_KEY = "main-screen"
+VOLUME_KEY = "volume"
+OVERLAY_EXPIRY_KEY = "overlay-expiry"
+
 """
 socat -d -d pty,raw,echo=0 pty,raw,echo=0
 cat < /dev/pts/3
@@ -36,96 +52,191 @@ VOLUME_SCR = VolumeScreen()
 
 
 class Display:
-    def __init__(self, ser=None):
-        self.__timer = None
+    """
+    Screens are changed and output only in the event loop thread, the public methods
+    pass the calls from other threads to the loop in their order
+    """
+
+    def __init__(self, ser=None, loop: EventLoop = None):
+        if loop is None:
+            loop = globalvariables.loop
+        if loop is None:
+            # standalone use, e.g. scripts without control.py
+            loop = EventLoop()
+            loop.start()
+        self.__loop = loop
+        self.__scheduler = DisplayScheduler(loop, MIN_OUTPUT_INTERVALS)
         if ser is not None:
-            self.__writer = SerialWriter(ser)
+            self.__writer = SerialWriter(ser, loop)
         else:
-            self.__writer = OutputWriter()
-        self.__writer.start()
-        time.sleep(.1)
+            self.__writer = OutputWriter(loop)
         self.__screen = INFO_SCR
+        # trace of the command whose display call runs in the loop now
+        self.__trace = None
+        # scheduler key -> traces of the commands waiting for its output
+        self.__keyTraces = {}
+        self.__loop.runInLoopAndWait(self.__writer.start)
+        self.__closed = False
 
     def close(self):
+        if not self.__closed:
+            self.__closed = True
+            self.__loop.runInLoopAndWait(self.__close)
+
+    def __close(self):
+        # pending outputs get written
+        self.__scheduler.close()
+        logging.debug("Display writer: " + self.__writer.toString())
         self.__writer.stop()
-        # the writer thread locks up at joining, therefore the timeout has to be specified
-        self.__writer.join(0.1)
-        if self.__timer is not None:
-            self.__close_timer()
 
     def __del__(self):
         self.close()
 
+    def frameAcked(self, screenId: int, version: int):
+        self.__loop.runInLoop(self.__writer.frameAcked, screenId, version)
+
+    def __runInLoop(self, callback, *args):
+        # display change requested by the command executed in this thread
+        trace = tracing.stampDisplay()
+        if trace is None:
+            self.__loop.runInLoop(callback, *args)
+        else:
+            self.__loop.runInLoop(self.__runTraced, trace, callback, args)
+
+    def __runTraced(self, trace: tracing.Trace, callback, args: tuple):
+        self.__trace = trace
+        try:
+            callback(*args)
+        finally:
+            self.__trace = None
+
+    def __schedule(self, key: str, output, priority: int, delay: float = 0, traced: bool = True):
+        """
+        Schedules output(traces), the traces of the commands requesting the key get written with its frame
+        """
+        if traced:
+            self.__addTrace(key)
+        self.__scheduler.schedule(key, lambda: output(self.__keyTraces.pop(key, ())), priority, delay)
+
+    def __addTrace(self, key: str):
+        if self.__trace is not None:
+            self.__keyTraces.setdefault(key, []).append(self.__trace)
+
+    def __moveTraces(self, fromKey: str, toKey: str):
+        traces = self.__keyTraces.pop(fromKey, None)
+        if traces:
+            self.__keyTraces.setdefault(toKey, []).extend(traces)
+
     def getScreen(self) -> AbstractScreen:
+        """
+        For reading only, screens are changed in the loop thread
+        """
         return self.__screen
 
     def setRadioScreen(self):
+        self.__runInLoop(self.__setRadioScreen)
+
+    def __setRadioScreen(self):
         RADIO_SCR.copyFrom(self.__screen)
-        # print("RADIO: copying from " + str(self.__screen))
-        # print("has cd: " + str(self.__screen.cdAvailable))
-        # print("")
         self.__screen = RADIO_SCR
 
     def setCDPlayingScreen(self):
+        self.__runInLoop(self.__setCDPlayingScreen)
+
+    def __setCDPlayingScreen(self):
         CD_PLAYING_SCR.copyFrom(self.__screen)
         self.__screen = CD_PLAYING_SCR
 
+    def showRadioMetadata(self, station: str = None, title: str = None):
+        """
+        Updates the station and/or title of the radio screen, shown if current
+        """
+        self.__runInLoop(self.__showRadioMetadata, station, title)
+
+    def __showRadioMetadata(self, station: str, title: str):
+        # kept in the radio screen also while another screen is shown
+        if station is not None:
+            RADIO_SCR.setStation(station)
+        if title is not None:
+            RADIO_SCR.setRadioTitle(title)
+        if self.__screen is RADIO_SCR:
+            self.__showScreen()
+
+    def showRadioStation(self, stationLines: Tuple[str, ...]):
+        """
+        Shows the station lines prepared in advance, the title gets cleared
+        """
+        self.__runInLoop(self.__showRadioStation, stationLines)
+
+    def __showRadioStation(self, stationLines: Tuple[str, ...]):
+        RADIO_SCR.setStationLines(stationLines)
+        if self.__screen is RADIO_SCR:
+            self.__showScreen()
+
+    def showRadioBuffering(self, buffering: bool):
+        """
+        Buffering shown instead of the radio title while the stream recovers
+        """
+        self.__runInLoop(self.__showRadioBuffering, buffering)
+
+    def __showRadioBuffering(self, buffering: bool):
+        RADIO_SCR.setBuffering(buffering)
+        if self.__screen is RADIO_SCR:
+            self.__showScreen()
+
+    def showCDTracks(self, trackNb: int, tracks: int):
+        self.__runInLoop(self.__showCDTracks, trackNb, tracks)
+
+    def __showCDTracks(self, trackNb: int, tracks: int):
+        self.__setCDPlayingScreen()
+        self.__screen.setTrackNb(trackNb)
+        self.__screen.setTracks(tracks)
+        self.__showScreen()
+
     def showScreen(self):
-        # print("Showing screen " + str(self.__screen))
-        # print("has cd: " + str(self.__screen.cdAvailable))
-        # print("")
-        self.__writer.output(self.__screen)
+        self.__runInLoop(self.__showScreen)
+
+    def __showScreen(self):
+        if self.__scheduler.isPending(OVERLAY_EXPIRY_KEY):
+            # volume overlay shown, the main screen follows at its expiry
+            self.__addTrace(OVERLAY_EXPIRY_KEY)
+            return
+        self.__schedule(MAIN_SCREEN_KEY, self.__outputScreen, MAIN_PRIORITY)
+
+    def __outputScreen(self, traces=()):
+        self.__writer.output(self.__screen, traces)
 
     def showCDInfo(self, text: str):
-        CD_INFO_SCR.copyFrom(self.__screen)
-        self.__screen = CD_INFO_SCR
-        self.__screen.setText(text)
-        self.showScreen()
+        self.__runInLoop(self.__showText, CD_INFO_SCR, text)
 
     def showError(self, message: str):
-        ERROR_SCR.copyFrom(self.__screen)
-        self.__screen = ERROR_SCR
-        self.__screen.setText(message)
-        self.showScreen()
+        self.__runInLoop(self.__showText, ERROR_SCR, message)
 
     def showInfo(self, message: str):
-        INFO_SCR.copyFrom(self.__screen)
-        self.__screen = INFO_SCR
-        self.__screen.setText(message)
-        self.showScreen()
+        self.__runInLoop(self.__showText, INFO_SCR, message)
+
+    def __showText(self, screen: AbstractScreen, text: str):
+        screen.copyFrom(self.__screen)
+        self.__screen = screen
+        self.__screen.setText(text)
+        # texts (e.g. errors) are not held back by the volume overlay, they end it
+        self.__scheduler.cancel(OVERLAY_EXPIRY_KEY)
+        self.__moveTraces(OVERLAY_EXPIRY_KEY, MAIN_SCREEN_KEY)
+        self.__showScreen()
 
     def showVolume(self, volume: int):
-        self.__activate_timer()
+        self.__runInLoop(self.__showVolume, volume)
+
+    def __showVolume(self, volume: int):
         # filling the volume screen
         VOLUME_SCR.copyFrom(self.__screen)
-        # print("VOLUME: copying from " + str(self.__screen))
-        # print("has cd: " + str(self.__screen.cdAvailable))
-        # print("")
         VOLUME_SCR.setVolume(volume)
-        # displaying without changing the main screen
-        self.__writer.output(VOLUME_SCR)
-
-    def __activate_timer(self):
-        if self.__timer is None:
-            self.__start_timer()
-        else:
-            if self.__timer.is_alive():
-                # cancel and reschedule
-                self.__close_timer()
-                # new timer
-                self.__start_timer()
-
-    def __start_timer(self):
-        self.__timer = Timer(VOL_TIMEOUT, self.__timer_finished)
-        self.__timer.setDaemon(True)
-
-        self.__timer.start()
-
-    def __close_timer(self):
-        self.__timer.cancel()
-        self.__timer.join()
-
-    def __timer_finished(self):
-        # just showing the main screen
-        self.showScreen()
-        self.__timer = None
+        # displaying without changing the main screen, main screen updates wait for the overlay expiry
+        self.__scheduler.cancel(MAIN_SCREEN_KEY)
+        self.__moveTraces(MAIN_SCREEN_KEY, OVERLAY_EXPIRY_KEY)
+        self.__schedule(VOLUME_KEY, self.__outputVolume, OVERLAY_PRIORITY)
+        # the volume command waits for its overlay frame only
+        self.__schedule(OVERLAY_EXPIRY_KEY, self.__outputScreen, MAIN_PRIORITY, VOL_TIMEOUT, traced=False)
+
+    def __outputVolume(self, traces=()):
+        self.__writer.output(VOLUME_SCR, traces)
@@ -0,0 +1,128 @@
+import heapq
+import itertools
+import logging
+import time
+
+from typing import Callable, Dict, Hashable
+
+from eventloop import EventLoop
+
+# heap entry fields
+_DUE, _PRIORITY, _SEQ, _KEY, _ACTION = range(5)
+
+
+class DisplayScheduler:
+    """
+    Runs timed display actions on timers of the event loop. Called only from the loop thread.
+    Actions are keyed, scheduling a key again replaces its pending action (latest wins).
+    Due actions run by priority (lower first). Actions of one priority class
+    run not more often than the class minimum interval, later ones get postponed.
+    """
+
+    def __init__(self, loop: EventLoop, minIntervals: Dict[int, float]):
+        """
+        :param minIntervals: priority -> minimum seconds between two actions of the priority
+        """
+        self.__loop = loop
+        self.__minIntervals = minIntervals
+        # [due, priority, seq, key, action], cancelled entries have action None
+        self.__heap = []
+        # key -> pending heap entry
+        self.__entries = {}
+        # priority -> time of the last action run
+        self.__lastRuns = {}
+        self.__seq = itertools.count()
+        # loop timer for the earliest action
+        self.__timer = None
+        self.__timerDue = None
+        self.__stopped = False
+
+    def schedule(self, key: Hashable, action: Callable[[], None], priority: int, delay: float = 0):
+        if self.__stopped:
+            return
+        self.__cancel(key)
+        entry = [time.monotonic() + delay, priority, next(self.__seq), key, action]
+        self.__entries[key] = entry
+        heapq.heappush(self.__heap, entry)
+        self.__armTimer()
+
+    def cancel(self, key: Hashable):
+        self.__cancel(key)
+
+    def isPending(self, key: Hashable) -> bool:
+        return key in self.__entries
+
+    def close(self):
+        """
+        Stops scheduling, pending actions are run right away
+        """
+        if self.__stopped:
+            return
+        self.__stopped = True
+        if self.__timer is not None:
+            self.__timer.cancel()
+        entries = sorted(entry for entry in self.__heap if entry[_ACTION] is not None)
+        self.__heap.clear()
+        self.__entries.clear()
+        for entry in entries:
+            self.__runAction(entry[_ACTION])
+
+    def __cancel(self, key: Hashable):
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            # removed from the heap lazily
+            entry[_ACTION] = None
+
+    def __armTimer(self):
+        while self.__heap and self.__heap[0][_ACTION] is None:
+            heapq.heappop(self.__heap)
+        if not self.__heap:
+            return
+        due = self.__heap[0][_DUE]
+        if self.__timer is not None:
+            if self.__timerDue <= due:
+                return
+            self.__timer.cancel()
+        self.__timerDue = due
+        self.__timer = self.__loop.callLater(due - time.monotonic(), self.__onTimer)
+
+    def __onTimer(self):
+        self.__timer = None
+        while not self.__stopped:
+            action = self.__popDueAction()
+            if action is None:
+                break
+            self.__runAction(action)
+        if not self.__stopped:
+            self.__armTimer()
+
+    def __popDueAction(self):
+        now = time.monotonic()
+        dueEntries = []
+        while self.__heap and self.__heap[0][_DUE] <= now:
+            entry = heapq.heappop(self.__heap)
+            if entry[_ACTION] is not None:
+                dueEntries.append(entry)
+        chosen = None
+        # lower priority first, in the order of scheduling within a priority
+        for entry in sorted(dueEntries, key=lambda dueEntry: (dueEntry[_PRIORITY], dueEntry[_SEQ])):
+            if chosen is None:
+                notBefore = self.__lastRuns.get(entry[_PRIORITY], float('-inf')) \
+                            + self.__minIntervals.get(entry[_PRIORITY], 0)
+                if notBefore <= now:
+                    chosen = entry
+                    continue
+                # rate capped, postponed behind other due actions
+                entry[_DUE] = notBefore
+            heapq.heappush(self.__heap, entry)
+        if chosen is None:
+            return None
+        del self.__entries[chosen[_KEY]]
+        self.__lastRuns[chosen[_PRIORITY]] = now
+        return chosen[_ACTION]
+
+    def __runAction(self, action: Callable[[], None]):
+        try:
+            action()
+        except Exception as e:
+            logging.error(e, exc_info=True)
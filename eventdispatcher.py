@@ -0,0 +1,234 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from typing import Callable, List, Tuple
+
+from eventloop import EventLoop
+from latencystats import LatencyStats
+
+# time a callback may take before the dispatcher stops waiting for it and continues with other events
+CALLBACK_TIME_BUDGET_SECS = 0.2
+# threads running the callbacks, slow callbacks keep running there while the dispatcher continues.
+# Shared by the dispatchers of all mpv instances
+CALLBACK_WORKERS = 3
+# maximum number of queued events, the oldest ones are dropped beyond
+MAX_PENDING_EVENTS = 1000
+
+PROPERTY_CHANGE_EVENT = "property-change"
+
+_callbackExecutor = None
+_callbackExecutorLock = threading.Lock()
+
+
+def getCallbackExecutor() -> ThreadPoolExecutor:
+    global _callbackExecutor
+    with _callbackExecutorLock:
+        if _callbackExecutor is None:
+            _callbackExecutor = ThreadPoolExecutor(max_workers=CALLBACK_WORKERS, thread_name_prefix="mpv-callback")
+        return _callbackExecutor
+
+
+class CallbackState:
+    """
+    Statistics and pending invocations of one registered callback
+    """
+
+    def __init__(self, name: str, coalescing: bool):
+        self.name = name
+        # property callbacks need only the latest value
+        self.coalescing = coalescing
+        self.latency = LatencyStats(name)
+        # still running in a worker after its time budget
+        self.busy = False
+        # invocations waiting for the busy callback to finish
+        self.pending = deque()
+        self.coalesced = 0
+        self.dropped = 0
+        self.overruns = 0
+
+    def toString(self) -> str:
+        return "%s, coalesced %d, dropped %d, over budget %d" % (
+            self.latency.toString(), self.coalesced, self.dropped, self.overruns)
+
+
+class EventDispatcher:
+    """
+    Calls the callbacks of mpv events in its own thread, or in the event loop thread if given.
+    Queued property-change events of the same property are coalesced, only the latest value is delivered.
+    Callbacks run in the shared worker threads, a callback exceeding the time budget does not hold up the other events.
+    Invocations of one callback never overlap, they are kept in order (coalesced for properties).
+    """
+
+    def __init__(self, getCallbacks: Callable[[dict], List[Tuple[str, Callable, tuple]]], loop: EventLoop = None):
+        """
+        :param getCallbacks: returns list of (event name, callback, arguments) to call for the event message
+        :param loop: dispatching in the loop thread instead of an own thread, waiting for the callbacks on loop timers
+        """
+        self.__getCallbacks = getCallbacks
+        self.__loop = loop
+        self.__condition = threading.Condition()
+        # key -> message. Property changes are keyed by the property name, other events are unique
+        self.__events = OrderedDict()
+        self.__eventSerial = 0
+        self.__stopped = False
+        self.__states = {}
+        self.__statesLock = threading.Lock()
+        self.__executor = getCallbackExecutor()
+        # loop dispatching: callbacks of the current message not dispatched yet, timer of the awaited callback
+        self.__invocations = deque()
+        self.__awaited = None
+        self.__thread = None
+        if loop is None:
+            self.__thread = threading.Thread(target=self.__run, name="mpv-events")
+            self.__thread.setDaemon(True)
+        self.coalesced = 0
+        self.dropped = 0
+
+    def start(self):
+        if self.__thread is not None:
+            self.__thread.start()
+
+    def stop(self):
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+        if self.__thread is not None and self.__thread.is_alive() and self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def put(self, message: dict):
+        with self.__condition:
+            if message["event"] == PROPERTY_CHANGE_EVENT:
+                key = message["name"]
+                if key in self.__events:
+                    # latest value wins
+                    self.coalesced += 1
+                    del self.__events[key]
+            else:
+                self.__eventSerial += 1
+                key = self.__eventSerial
+            if len(self.__events) >= MAX_PENDING_EVENTS:
+                self.__events.popitem(last=False)
+                self.dropped += 1
+            self.__events[key] = message
+            self.__condition.notify()
+        if self.__loop is not None:
+            self.__loop.runInLoop(self.__dispatchInLoop)
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while not self.__events and not self.__stopped:
+                    self.__condition.wait()
+                if self.__stopped:
+                    return
+                key, message = self.__events.popitem(last=False)
+            try:
+                for name, callback, args in self.__getCallbacks(message):
+                    self.__dispatch(name, callback, args, message["event"] == PROPERTY_CHANGE_EVENT)
+            except Exception as e:
+                logging.error(e, exc_info=True)
+
+    def __getState(self, name: str, callback: Callable, coalescing: bool) -> CallbackState:
+        key = (name, callback)
+        with self.__statesLock:
+            state = self.__states.get(key)
+            if state is None:
+                state = CallbackState(name + ": " + getattr(callback, "__name__", str(callback)), coalescing)
+                self.__states[key] = state
+            return state
+
+    def __dispatchInLoop(self):
+        """
+        Dispatches the queued events in the loop thread until a callback exceeds the time budget, the dispatching
+        continues once the callback finishes or the budget passes
+        """
+        while self.__awaited is None:
+            if not self.__invocations:
+                with self.__condition:
+                    if not self.__events or self.__stopped:
+                        return
+                    key, message = self.__events.popitem(last=False)
+                try:
+                    coalescing = message["event"] == PROPERTY_CHANGE_EVENT
+                    self.__invocations.extend((invocation, coalescing) for invocation in self.__getCallbacks(message))
+                except Exception as e:
+                    logging.error(e, exc_info=True)
+                continue
+            (name, callback, args), coalescing = self.__invocations.popleft()
+            state, future = self.__submit(name, callback, args, coalescing)
+            if future is None or future.done():
+                continue
+            awaited = self.__loop.callLater(CALLBACK_TIME_BUDGET_SECS, lambda: self.__continueInLoop(awaited, state))
+            self.__awaited = awaited
+            future.add_done_callback(lambda f: self.__loop.runInLoop(self.__continueInLoop, awaited))
+
+    def __continueInLoop(self, awaited, state: CallbackState = None):
+        """
+        :param state: of the callback over its time budget, None if it finished in time
+        """
+        if awaited is not self.__awaited:
+            # the budget passed before the callback finished, or the other way round
+            return
+        self.__awaited = None
+        if state is not None:
+            state.overruns += 1
+            logging.debug("Callback %s over time budget, continuing in background", state.name)
+        else:
+            awaited.cancel()
+        self.__dispatchInLoop()
+
+    def __dispatch(self, name: str, callback: Callable, args: tuple, coalescing: bool):
+        state, future = self.__submit(name, callback, args, coalescing)
+        if future is None:
+            return
+        try:
+            future.result(CALLBACK_TIME_BUDGET_SECS)
+        except FutureTimeoutError:
+            state.overruns += 1
+            logging.debug("Callback %s over time budget, continuing in background", state.name)
+
+    def __submit(self, name: str, callback: Callable, args: tuple, coalescing: bool) -> (CallbackState, Future):
+        """
+        :return: state of the callback and future of the worker calling it, None if queued after its running invocation
+        """
+        state = self.__getState(name, callback, coalescing)
+        with self.__statesLock:
+            if state.busy:
+                # the previous invocation is still running
+                if state.coalescing and state.pending:
+                    state.pending.clear()
+                    state.coalesced += 1
+                elif len(state.pending) >= MAX_PENDING_EVENTS:
+                    state.pending.popleft()
+                    state.dropped += 1
+                state.pending.append(args)
+                return state, None
+            state.busy = True
+        return state, self.__executor.submit(self.__call, state, callback, args)
+
+    def __call(self, state: CallbackState, callback: Callable, args: tuple):
+        while True:
+            start = time.monotonic()
+            try:
+                callback(*args)
+            except Exception as e:
+                logging.error(e, exc_info=True)
+            state.latency.add(time.monotonic() - start)
+            with self.__statesLock:
+                if not state.pending:
+                    state.busy = False
+                    return
+                args = state.pending.popleft()
+
+    def getStats(self) -> List[CallbackState]:
+        with self.__statesLock:
+            return list(self.__states.values())
+
+    def toString(self) -> str:
+        lines = ["events coalesced %d, dropped %d" % (self.coalesced, self.dropped)]
+        lines += [state.toString() for state in self.getStats()]
+        return "\n".join(lines)
+
@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import logging
+import os
+import selectors
+import threading
+import time
+from collections import deque
+
+from typing import Callable
+
+
+class TimerHandle:
+    __slots__ = ('when', 'callback', 'cancelled')
+
+    def __init__(self, when: float, callback: Callable[[], None]):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class EventLoop:
+    """
+    selectors-based loop running fd callbacks, timers and calls from other threads in one thread.
+    addReader/removeReader and runInLoop may be called from any thread,
+    callLater only from the loop thread.
+    """
+
+    def __init__(self):
+        self.__selector = selectors.DefaultSelector()
+        # heap of (when, seq, TimerHandle)
+        self.__timers = []
+        self.__seq = itertools.count()
+        self.__calls = deque()
+        self.__callsLock = threading.Lock()
+        # self-pipe waking up select for calls from other threads
+        self.__wakeupFds = os.pipe()
+        for fd in self.__wakeupFds:
+            os.set_blocking(fd, False)
+        self.__selector.register(self.__wakeupFds[0], selectors.EVENT_READ, self.__drainWakeup)
+        self.__stopped = False
+        self.__threadId = None
+        self.__thread = None
+
+    def start(self):
+        """
+        Runs the loop in its own thread
+        """
+        self.__thread = threading.Thread(target=self.run, name="loop")
+        self.__thread.setDaemon(True)
+        self.__thread.start()
+
+    def run(self):
+        self.__threadId = threading.get_ident()
+        try:
+            while not self.__stopped:
+                self.__runOnce()
+        finally:
+            self.__threadId = None
+
+    def stop(self):
+        self.__stopped = True
+        self.__wakeup()
+        if self.__thread is not None and self.__thread.is_alive() and not self.isLoopThread():
+            self.__thread.join()
+
+    def isLoopThread(self) -> bool:
+        return self.__threadId == threading.get_ident()
+
+    def addReader(self, fd: int, callback: Callable[[], None]):
+        """
+        callback is called in the loop thread whenever fd is readable
+        """
+        self.runInLoop(self.__selector.register, fd, selectors.EVENT_READ, callback)
+
+    def removeReader(self, fd: int):
+        self.runInLoop(self.__selector.unregister, fd)
+
+    def callLater(self, delay: float, callback: Callable[[], None]) -> TimerHandle:
+        handle = TimerHandle(time.monotonic() + delay, callback)
+        heapq.heappush(self.__timers, (handle.when, next(self.__seq), handle))
+        return handle
+
+    def runInLoop(self, callback: Callable, *args):
+        """
+        Runs callback right away if called from the loop thread or the loop is not running,
+        queues it for the loop thread otherwise. Queued callbacks run in order
+        """
+        if self.__threadId is None or self.isLoopThread():
+            callback(*args)
+            return
+        with self.__callsLock:
+            self.__calls.append((callback, args))
+        self.__wakeup()
+
+    def runInLoopAndWait(self, callback: Callable, *args, timeout: float = 1):
+        """
+        Runs callback in the loop thread and waits for it to finish
+        """
+        if self.__threadId is None or self.isLoopThread():
+            return callback(*args)
+        done = threading.Event()
+
+        def run():
+            try:
+                callback(*args)
+            finally:
+                done.set()
+
+        self.runInLoop(run)
+        done.wait(timeout)
+
+    def __wakeup(self):
+        try:
+            os.write(self.__wakeupFds[1], b'\0')
+        except BlockingIOError:
+            # already woken up
+            pass
+
+    def __drainWakeup(self):
+        try:
+            while os.read(self.__wakeupFds[0], 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def __runOnce(self):
+        if self.__calls:
+            timeout = 0
+        elif self.__timers:
+            timeout = max(0, self.__timers[0][0] - time.monotonic())
+        else:
+            timeout = None
+        for key, mask in self.__selector.select(timeout):
+            self.__run(key.data)
+        now = time.monotonic()
+        while self.__timers and self.__timers[0][0] <= now:
+            handle = heapq.heappop(self.__timers)[2]
+            if not handle.cancelled:
+                self.__run(handle.callback)
+        with self.__callsLock:
+            calls = self.__calls
+            self.__calls = deque()
+        for callback, args in calls:
+            self.__run(callback, *args)
+
+    def __run(self, callback: Callable, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            logging.error(e, exc_info=True)
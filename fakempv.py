@@ -0,0 +1,441 @@
+#!/usr/bin/python3
+
+# usage: fakempv.py [mpv options] --input-ipc-server <socket path>
+#
+# Stand-in for /usr/bin/mpv speaking the JSON IPC protocol on the unix socket,
+# for testing without sound card, CD drive or network. Set
+# MPVBase.executable to the path of this script. It simulates the playlist,
+# CD chapters, icy-* metadata of streams and the property-change/playback
+# events. The behaviour is configured by environment variables:
+#
+#   FAKEMPV_LATENCY            delay of every reply in seconds (default 0)
+#   FAKEMPV_COMMAND_LATENCY    per-command delays, e.g. "loadfile=0.5,loadlist=0.2"
+#   FAKEMPV_CD_TRACKS          number of chapters of cdda:// (default 12)
+#   FAKEMPV_TRACK_SECS         duration of a track/chapter, 0 = endless (default 0)
+#   FAKEMPV_METADATA_SECS      period of icy-title changes of http streams, 0 = none (default 0)
+#   FAKEMPV_CONNECT_SECS       delay before an http stream starts playing, i.e. core-idle
+#                              turns false, paused streams get connected too (default 0)
+#
+# Besides the mpv commands it accepts these commands for fault injection:
+#
+#   ["fake-burst", <property>, <count>]   sends <count> property-change events at once
+#   ["fake-metadata", <title>]            changes icy-title of the current stream
+#   ["fake-end-file", <reason>]           ends the current file, e.g. with "error"
+#   ["fake-stall", <secs>]                the current stream waits for cache (paused-for-cache) for <secs>
+#   ["fake-fail", <count>]                the next <count> http streams fail to connect
+#
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+IPC_SERVER_OPTION = "--input-ipc-server"
+
+CD_FILENAME = "cdda://"
+
+
+def getEnvFloat(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def parseCommandLatencies(value: str) -> dict:
+    latencies = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, secs = item.split("=", 1)
+            latencies[name.strip()] = float(secs)
+    return latencies
+
+
+class FakeMPVError(Exception):
+    pass
+
+
+class FakeMPV:
+    """
+    Simulated player state, all methods are called with the lock held
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clients = []
+        self.cdTracks = int(getEnvFloat("FAKEMPV_CD_TRACKS", 12))
+        self.trackSecs = getEnvFloat("FAKEMPV_TRACK_SECS", 0)
+        self.connectSecs = getEnvFloat("FAKEMPV_CONNECT_SECS", 0)
+        # monotonic time the current stream gets connected
+        self.connectedAt = 0.0
+        # monotonic time the stalled stream continues
+        self.stalledUntil = 0.0
+        self.failingConnects = 0
+        self.playlist = []
+        self.pos = -1
+        self.fileStarted = 0.0
+        self.stationSerial = 0
+        self.properties = {
+            "pause": False,
+            "volume": 100,
+            "mute": False,
+            "audio-device": "auto",
+            "idle-active": True,
+            "core-idle": True,
+            "playlist-pos": -1,
+            "playlist-count": 0,
+            "path": None,
+            "metadata": None,
+            "chapter": None,
+            "chapters": None,
+            "paused-for-cache": False,
+            "demuxer-cache-state": None,
+            "time-pos": None,
+        }
+        self.options = {}
+
+    # -------------------------------------------------------------------------
+    # Events
+    # -------------------------------------------------------------------------
+    def sendEvent(self, event: dict):
+        for client in list(self.clients):
+            client.send(event)
+
+    def setProperty(self, name: str, value):
+        if self.properties.get(name) != value:
+            self.properties[name] = value
+            for client in list(self.clients):
+                client.propertyChanged(name, value)
+            if name in ("pause", "idle-active"):
+                self.updateCoreIdle()
+
+    def updateCoreIdle(self):
+        now = time.monotonic()
+        idle = self.properties["pause"] or self.properties["idle-active"] or now < self.connectedAt \
+               or now < self.stalledUntil
+        self.setProperty("core-idle", idle)
+
+    # -------------------------------------------------------------------------
+    # Playlist
+    # -------------------------------------------------------------------------
+    def updatePlaylistProperties(self):
+        self.setProperty("playlist-count", len(self.playlist))
+        self.setProperty("playlist-pos", self.pos)
+
+    def startFile(self, pos: int):
+        self.endFile("stop")
+        if pos < 0 or pos >= len(self.playlist):
+            self.pos = -1
+            self.updatePlaylistProperties()
+            self.setProperty("idle-active", True)
+            self.sendEvent({"event": "idle"})
+            return
+        self.pos = pos
+        path = self.playlist[pos]
+        self.stall(0)
+        if path.startswith("http") and self.failingConnects > 0:
+            self.failingConnects -= 1
+            self.sendEvent({"event": "start-file", "playlist_entry_id": pos + 1})
+            self.sendEvent({"event": "end-file", "reason": "error"})
+            self.pos = -1
+            self.updatePlaylistProperties()
+            self.setProperty("idle-active", True)
+            self.sendEvent({"event": "idle"})
+            return
+        self.fileStarted = time.monotonic()
+        self.connectedAt = self.fileStarted + self.connectSecs if path.startswith("http") else 0.0
+        self.updatePlaylistProperties()
+        self.setProperty("idle-active", False)
+        self.sendEvent({"event": "start-file", "playlist_entry_id": pos + 1})
+        self.setProperty("path", path)
+        if path == CD_FILENAME:
+            self.setProperty("chapters", self.cdTracks)
+            self.setProperty("chapter", 0)
+        elif path.startswith("http"):
+            self.stationSerial += 1
+            self.setProperty("metadata", {"icy-name": "Station %d" % (pos + 1),
+                                          "icy-title": "Song %d" % self.stationSerial})
+        else:
+            self.setProperty("metadata", {"title": os.path.basename(path)})
+        self.sendEvent({"event": "file-loaded"})
+        self.sendEvent({"event": "playback-restart"})
+
+    def endFile(self, reason: str):
+        if self.properties["path"] is None:
+            return
+        self.sendEvent({"event": "end-file", "reason": reason})
+        for name in ("path", "metadata", "chapter", "chapters"):
+            self.setProperty(name, None)
+
+    def nextFile(self):
+        self.startFile(self.pos + 1 if self.pos + 1 < len(self.playlist) else -1)
+
+    def tick(self, metadataSecs: float):
+        """
+        Advances the simulated playback, called periodically
+        """
+        if 0 < self.stalledUntil <= time.monotonic():
+            self.stall(0)
+        self.updateCoreIdle()
+        path = self.properties["path"]
+        if path is None or self.properties["pause"]:
+            return
+        elapsed = time.monotonic() - self.fileStarted
+        self.setProperty("time-pos", round(elapsed, 1))
+        if self.trackSecs > 0 and path == CD_FILENAME:
+            chapter = int(elapsed / self.trackSecs)
+            if chapter >= self.cdTracks:
+                self.endFile("eof")
+                self.nextFile()
+            else:
+                self.setProperty("chapter", chapter)
+        elif self.trackSecs > 0 and not path.startswith("http") and elapsed > self.trackSecs:
+            self.endFile("eof")
+            self.nextFile()
+        elif metadataSecs > 0 and path.startswith("http") and elapsed > metadataSecs:
+            self.fileStarted = time.monotonic()
+            self.stationSerial += 1
+            self.changeTitle("Song %d" % self.stationSerial)
+
+    def stall(self, secs: float):
+        self.stalledUntil = time.monotonic() + secs if secs > 0 else 0.0
+        self.setProperty("paused-for-cache", secs > 0)
+        self.updateCoreIdle()
+
+    def changeTitle(self, title: str):
+        metadata = dict(self.properties["metadata"] or {})
+        metadata["icy-title"] = title
+        self.setProperty("metadata", metadata)
+
+    # -------------------------------------------------------------------------
+    # Commands
+    # -------------------------------------------------------------------------
+    def execute(self, client: 'Client', args: list):
+        name = args[0]
+        if name == "get_property":
+            return self.getProperty(args[1])
+        elif name in ("set_property", "set"):
+            self.writeProperty(args[1], args[2])
+        elif name == "observe_property":
+            client.observe(args[1], args[2], self.properties.get(args[2]))
+        elif name == "unobserve_property":
+            client.unobserve(args[1])
+        elif name in ("enable_event", "disable_event", "client_name", "ao-reload"):
+            pass
+        elif name == "loadfile":
+            self.loadFiles([args[1]], args[2] if len(args) > 2 else "replace")
+        elif name == "loadlist":
+            self.loadFiles(self.readPlaylist(args[1]), args[2] if len(args) > 2 else "replace")
+        elif name == "playlist-clear":
+            self.playlist = [self.playlist[self.pos]] if self.pos >= 0 else []
+            self.pos = 0 if self.pos >= 0 else -1
+            self.updatePlaylistProperties()
+        elif name == "playlist-remove":
+            self.removeEntry(self.pos if args[1] == "current" else int(args[1]))
+        elif name == "playlist-next":
+            self.nextFile()
+        elif name == "playlist-prev":
+            self.startFile(self.pos - 1)
+        elif name == "stop":
+            self.endFile("stop")
+            self.playlist = []
+            self.startFile(-1)
+        elif name == "quit":
+            client.quitting = True
+        elif name == "fake-burst":
+            for i in range(int(args[2])):
+                client.propertyChanged(args[1], self.properties.get(args[1]))
+        elif name == "fake-metadata":
+            self.changeTitle(args[1])
+        elif name == "fake-end-file":
+            self.endFile(args[1])
+            self.startFile(-1)
+        elif name == "fake-stall":
+            if self.properties["path"] is not None:
+                self.stall(float(args[1]))
+        elif name == "fake-fail":
+            self.failingConnects = int(args[1])
+        else:
+            raise FakeMPVError("invalid parameter")
+
+    def getProperty(self, name: str):
+        if name == "property-list":
+            return sorted(self.properties)
+        if name.startswith("options/"):
+            return self.options.get(name[8:])
+        if name not in self.properties:
+            raise FakeMPVError("property not found")
+        value = self.properties[name]
+        if value is None:
+            raise FakeMPVError("property unavailable")
+        return value
+
+    def writeProperty(self, name: str, value):
+        if name.startswith("options/"):
+            self.options[name[8:]] = value
+        elif name == "playlist-pos":
+            self.startFile(int(value))
+        elif name == "chapter":
+            if self.properties["chapters"] is None or not 0 <= int(value) < self.properties["chapters"]:
+                raise FakeMPVError("property unavailable")
+            self.fileStarted = time.monotonic() - int(value) * self.trackSecs
+            self.setProperty("chapter", int(value))
+            self.sendEvent({"event": "playback-restart"})
+        elif name in self.properties:
+            self.setProperty(name, value)
+        else:
+            raise FakeMPVError("property not found")
+
+    def loadFiles(self, paths: list, mode: str):
+        if mode == "replace":
+            self.playlist = list(paths)
+            self.startFile(0)
+        else:
+            self.playlist.extend(paths)
+            self.updatePlaylistProperties()
+            if mode == "append-play" and self.pos < 0:
+                self.startFile(len(self.playlist) - len(paths))
+
+    def readPlaylist(self, path: str) -> list:
+        try:
+            with open(path, "r") as f:
+                return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        except OSError:
+            raise FakeMPVError("error running command")
+
+    def removeEntry(self, index: int):
+        if not 0 <= index < len(self.playlist):
+            raise FakeMPVError("invalid parameter")
+        del self.playlist[index]
+        if index < self.pos:
+            self.pos -= 1
+            self.updatePlaylistProperties()
+        elif index == self.pos:
+            # removing the current entry plays the next one
+            self.startFile(self.pos if self.pos < len(self.playlist) else -1)
+        else:
+            self.updatePlaylistProperties()
+
+
+class Client:
+    """
+    One IPC connection
+    """
+
+    def __init__(self, fake: FakeMPV, conn: socket.socket, latency: float, commandLatencies: dict):
+        self.fake = fake
+        self.conn = conn
+        self.latency = latency
+        self.commandLatencies = commandLatencies
+        self.sendLock = threading.Lock()
+        # observe id -> property name
+        self.observed = {}
+        self.quitting = False
+
+    def send(self, message: dict):
+        with self.sendLock:
+            try:
+                self.conn.sendall(json.dumps(message, separators=(",", ":")).encode("utf8") + b"\n")
+            except OSError:
+                pass
+
+    def observe(self, serial: int, name: str, value):
+        self.observed[serial] = name
+        # mpv sends the current value right away
+        self.sendPropertyChange(serial, name, value)
+
+    def unobserve(self, serial: int):
+        self.observed.pop(serial, None)
+
+    def propertyChanged(self, name: str, value):
+        for serial, observedName in list(self.observed.items()):
+            if observedName == name:
+                self.sendPropertyChange(serial, name, value)
+
+    def sendPropertyChange(self, serial: int, name: str, value):
+        message = {"event": "property-change", "id": serial, "name": name}
+        if value is not None:
+            message["data"] = value
+        self.send(message)
+
+    def serve(self):
+        buf = b""
+        while not self.quitting:
+            data = self.conn.recv(65536)
+            if not data:
+                break
+            buf += data
+            while b"\n" in buf and not self.quitting:
+                line, buf = buf.split(b"\n", 1)
+                if line.strip():
+                    self.handleLine(line)
+
+    def handleLine(self, line: bytes):
+        request = json.loads(line.decode("utf8"))
+        args = request.get("command", [])
+        reply = {"error": "success"}
+        if "request_id" in request:
+            reply["request_id"] = request["request_id"]
+        delay = self.commandLatencies.get(args[0] if args else "", self.latency)
+        if delay > 0:
+            time.sleep(delay)
+        with self.fake.lock:
+            try:
+                data = self.fake.execute(self, args)
+                if data is not None:
+                    reply["data"] = data
+            except (FakeMPVError, IndexError, ValueError, TypeError) as e:
+                reply["error"] = str(e) if isinstance(e, FakeMPVError) else "invalid parameter"
+            self.send(reply)
+
+
+def getSocketPath(argv: list) -> str:
+    for index, arg in enumerate(argv):
+        if arg == IPC_SERVER_OPTION:
+            return argv[index + 1]
+        if arg.startswith(IPC_SERVER_OPTION + "="):
+            return arg.split("=", 1)[1]
+    raise SystemExit("usage: fakempv.py [mpv options] " + IPC_SERVER_OPTION + " <socket path>")
+
+
+def ticker(fake: FakeMPV, metadataSecs: float):
+    while True:
+        time.sleep(0.1)
+        with fake.lock:
+            fake.tick(metadataSecs)
+
+
+def main(argv: list):
+    sockPath = getSocketPath(argv)
+    latency = getEnvFloat("FAKEMPV_LATENCY", 0)
+    commandLatencies = parseCommandLatencies(os.environ.get("FAKEMPV_COMMAND_LATENCY", ""))
+    metadataSecs = getEnvFloat("FAKEMPV_METADATA_SECS", 0)
+    fake = FakeMPV()
+    thread = threading.Thread(target=ticker, args=(fake, metadataSecs), daemon=True)
+    thread.start()
+
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(sockPath)
+    server.listen(5)
+    try:
+        while True:
+            conn, addr = server.accept()
+            client = Client(fake, conn, latency, commandLatencies)
+            with fake.lock:
+                fake.clients.append(client)
+            try:
+                client.serve()
+            finally:
+                with fake.lock:
+                    fake.clients.remove(client)
+                conn.close()
+            if client.quitting:
+                break
+    finally:
+        server.close()
+        try:
+            os.remove(sockPath)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,14 +1,18 @@
+import os
 from enum import Enum
 from pathlib import Path
 
-from typing import List
+from typing import List, Iterator
 
 from buttoncommand import B2, B3, B7, B8, B4, B6
+from commandexecutor import checkCancelled, CommandCancelled
+from config import FLASH_PLAYLIST_WINDOW
 from display import Display
 from extconfig import ExtConfig
 from mixer import Mixer
 from mpvsource import MPVSource
 from mympv import MyMPV
+from playlistloader import PlaylistLoader, PlaylistWindow
 from statefile import StateFile
 
 ROOT_DIR = Path('/home/kluci/Hudba')
@@ -25,6 +29,24 @@ def getOrderedChildPaths(path: Path) -> List[Path]:
     return sorted(path.iterdir(), key=lambda k: str(k).lower())
 
 
+def iterFiles(path: Path, level: int = 0) -> Iterator[Path]:
+    """
+    Generates files in the subtree in the getOrderedChildPaths order
+    :param path: directory path
+    :param level: currect directory traversal depth
+    """
+    # scandir entries know their type, no extra stat calls
+    with os.scandir(str(path)) as it:
+        entries = sorted(it, key=lambda e: e.path.lower())
+    for entry in entries:
+        # long walks in the command thread are cancellable
+        checkCancelled()
+        if entry.is_file():
+            yield Path(entry.path)
+        elif level < MAX_DIR_DEPTH and entry.is_dir():
+            yield from iterFiles(Path(entry.path), level + 1)
+
+
 class Dir:
     def __init__(self, path: Path):
         self.path = path
@@ -59,8 +81,11 @@ class FlashSource(MPVSource):
         super().__init__(display, extConfig, stateFile, mixer, player)
         self._status = Status.SELECT
         self._curDir = None  # type: Dir
+        self._loader = None  # type: PlaylistLoader
+        self._window = None  # type: PlaylistWindow
 
     def _start(self) -> None:
+        self._resetMPV()
         # naplnit uvodni strukturu
         self._curDir = self._getDirItem(ROOT_DIR)
 
@@ -112,19 +137,58 @@ class FlashSource(MPVSource):
         if self._curDir is not None:
             path = self._curDir.getCurrentPath()
             if path.is_dir():
-                self._appendChildrenToMPV(path=path, firstToPlay=True, level=0)
+                try:
+                    self._playDir(path)
+                except CommandCancelled:
+                    # no half-loaded playlist stays behind, the status is left to the preempting command
+                    self._stopPlaying()
+                    raise
             else:
                 self._startPlayback(path)
 
+    def _playDir(self, path: Path):
+        """
+        Starts playing the first file of the subtree right away, the rest is appended in background
+        or kept in the sliding window
+        """
+        files = iterFiles(path)
+        firstPath = next(files, None)
+        if firstPath is not None:
+            self._startPlayback(firstPath)
+            if FLASH_PLAYLIST_WINDOW > 0:
+                self._window = PlaylistWindow(self._player.getMPV(), files, FLASH_PLAYLIST_WINDOW, queued=1)
+                self._window.refill()
+            else:
+                self._loader = PlaylistLoader(self._player.getMPV(), files)
+                self._loader.start()
+
+    def _cancelLoader(self):
+        if self._loader is not None:
+            self._loader.cancel()
+            self._loader = None
+        if self._window is not None:
+            self._window.cancel()
+            self._window = None
+
+    def playlistPosChanged(self, pos: int):
+        window = self._window
+        if window is not None:
+            window.refill()
+
+    def fileEnded(self):
+        window = self._window
+        if window is not None:
+            window.refill()
+
+    def _stopPlaying(self):
+        self._cancelLoader()
+        super()._stopPlaying()
+
     def _startPlayback(self, path: Path):
         mpv = self._player.getMPV()  # type: MyMPV
         mpv.command("loadfile", str(path), "replace")
         mpv.play()
 
-    def _appendToPlayback(self, path: Path):
-        mpv = self._player.getMPV()  # type: MyMPV
-        mpv.command("loadfile", str(path), "append")
-
     def _displaySelect(self):
         # we have to create the TreeMsg
         pass
@@ -134,22 +198,3 @@ class FlashSource(MPVSource):
 
     def _getDirItem(self, path: Path) -> Dir:
         return Dir(path)
-
-    def _appendChildrenToMPV(self, path: Path, firstToPlay: bool, level: int) -> None:
-        """
-        Recursive method for adding files in subtree to mpv playlist
-        :param path: directory path
-        :param firstToPlay: the first to-be-played track is played with startPlayback,
-        all subsequent with appendToPlayback
-        :param level: currect directory traversal depth
-        """
-        # sorted by case insensitive name
-        for childPath in getOrderedChildPaths(path):
-            if childPath.is_file():
-                if firstToPlay:
-                    self._startPlayback(childPath)
-                    firstToPlay = False
-                else:
-                    self._appendToPlayback(childPath)
-            elif level < MAX_DIR_DEPTH:
-                self._appendChildrenToMPV(childPath, firstToPlay, level + 1)
@@ -0,0 +1,87 @@
+from typing import List, Optional, Tuple
+
+from abstractreader import INPUT_VOLUME_ID, INPUT_BUTTON_ID, INPUT_LOG_ID, INPUT_ACK_ID
+
+# defined in arduino!
+FRAME_START = 254
+FRAME_STOP = 253
+
+# frame type -> payload length, None = up to FRAME_STOP
+PAYLOAD_LENGTHS = {
+    INPUT_VOLUME_ID[0]: 1,
+    INPUT_BUTTON_ID[0]: 1,
+    INPUT_ACK_ID[0]: 2,
+    INPUT_LOG_ID[0]: None,
+}
+# longer log payload without FRAME_STOP is considered garbage
+MAX_LOG_LENGTH = 100
+
+
+class FrameParser:
+    """
+    Incremental parser of the frames received from arduino: FRAME_START type payload FRAME_STOP.
+    Bytes are fed as they arrive, complete frames are returned, an unfinished frame is kept for the next feed.
+    Bytes outside of frames and broken frames are skipped, parsing resumes at the next FRAME_START.
+    """
+
+    def __init__(self):
+        # starts with the unfinished frame, if any
+        self.__buffer = bytearray()
+        self.frames = 0
+        self.skippedBytes = 0
+
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        """
+        :return: list of (frame type, payload) of the frames completed by data
+        """
+        buffer = self.__buffer
+        buffer.extend(data)
+        frames = []
+        pos = 0
+        while True:
+            start = buffer.find(FRAME_START, pos)
+            if start < 0:
+                self.skippedBytes += len(buffer) - pos
+                pos = len(buffer)
+                break
+            self.skippedBytes += start - pos
+            result = self.__parseFrame(buffer, start)
+            if result is None:
+                # unfinished
+                pos = start
+                break
+            pos, frame = result
+            if frame is None:
+                # broken, resynchronizing right after its FRAME_START
+                self.skippedBytes += 1
+                pos = start + 1
+            else:
+                frames.append(frame)
+                self.frames += 1
+        del buffer[:pos]
+        return frames
+
+    def __parseFrame(self, buffer: bytearray, start: int) -> Optional[Tuple[int, Optional[Tuple[int, bytes]]]]:
+        """
+        :return: None if the frame is unfinished, (frame end, (type, payload) or None if broken) otherwise
+        """
+        payloadStart = start + 2
+        if payloadStart > len(buffer):
+            return None
+        frameType = buffer[start + 1]
+        if frameType not in PAYLOAD_LENGTHS:
+            return payloadStart, None
+        length = PAYLOAD_LENGTHS[frameType]
+        if length is None:
+            stop = buffer.find(FRAME_STOP, payloadStart, payloadStart + MAX_LOG_LENGTH + 1)
+            if stop < 0:
+                if len(buffer) - payloadStart > MAX_LOG_LENGTH:
+                    return payloadStart, None
+                return None
+        else:
+            stop = payloadStart + length
+            if stop >= len(buffer):
+                return None
+            if buffer[stop] != FRAME_STOP:
+                return stop, None
+        return stop + 1, (frameType, bytes(buffer[payloadStart:stop]))
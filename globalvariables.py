@@ -1 +1,5 @@
 player = None
+# eventloop.EventLoop of control.py
+loop = None
+# commandexecutor.CommandExecutor of control.py
+executor = None
@@ -3,5 +3,7 @@ from errorscreen import ErrorScreen
 ID = 2
 
 class InfoScreen(ErrorScreen):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(ID)
@@ -0,0 +1,64 @@
+import threading
+
+# upper bounds of the histogram buckets in seconds, the last bucket is open-ended
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class LatencyStats:
+    """
+    Thread-safe in-memory statistics of measured durations
+    """
+
+    def __init__(self, name: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.__lock = threading.Lock()
+        self.__buckets = buckets
+        self.__counts = [0] * (len(buckets) + 1)
+        self.__count = 0
+        self.__total = 0.0
+        self.__max = 0.0
+        self.__last = None
+
+    def add(self, duration: float):
+        with self.__lock:
+            self.__count += 1
+            self.__total += duration
+            self.__last = duration
+            if duration > self.__max:
+                self.__max = duration
+            for index, bound in enumerate(self.__buckets):
+                if duration <= bound:
+                    break
+            else:
+                index = len(self.__buckets)
+            self.__counts[index] += 1
+
+    def getCount(self) -> int:
+        return self.__count
+
+    def getLast(self) -> float:
+        return self.__last
+
+    def getAverage(self) -> float:
+        with self.__lock:
+            return self.__total / self.__count if self.__count > 0 else 0.0
+
+    def getMax(self) -> float:
+        return self.__max
+
+    def getHistogram(self) -> list:
+        """
+        :return: list of (upper bound, count) pairs, upper bound None for the last open-ended bucket
+        """
+        with self.__lock:
+            return list(zip(list(self.__buckets) + [None], self.__counts))
+
+    def toString(self) -> str:
+        with self.__lock:
+            if self.__count == 0:
+                return self.name + ": no data"
+            msg = "%s: count %d avg %.3fs max %.3fs last %.3fs" % (
+                self.name, self.__count, self.__total / self.__count, self.__max, self.__last)
+            buckets = ["<=%gs: %d" % (bound, count) if bound is not None else ">%gs: %d" % (self.__buckets[-1], count)
+                       for bound, count in zip(list(self.__buckets) + [None], self.__counts) if count > 0]
+            return msg + " [" + ", ".join(buckets) + "]"
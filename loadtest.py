@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+
+# usage: python3 loadtest.py [commands]
+#
+# End-to-end load test of Player against fakempv.py instead of mpv. The
+# hardware-bound parts (flash partition, ALSA mixer, network info) are
+# replaced with in-memory stand-ins, the screens are printed by OutputWriter.
+# Random button presses and volume knob turns are fed through the reader
+# command queue like from the Arduino and the command latencies are reported,
+# with the thread count and context switches of the process.
+# Fake mpv behaviour is configured by the FAKEMPV_* environment variables,
+# see fakempv.py.
+#
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+import globalvariables
+import mpv
+import player
+import statefile
+import tracing
+from buttoncommand import ButtonCommand, B1, B2, B3, B4
+from display import Display
+from eventloop import EventLoop
+from inputreader import InputReader
+from latencystats import LatencyStats
+from networkinfo import NetworkInfo
+from volumecommand import VolumeCommand
+
+DEFAULT_COMMANDS = 500
+STATIONS = 20
+
+
+class LoadTestExtConfig:
+    def __init__(self, playlistPath: str):
+        self.__playlistPath = playlistPath
+
+    def getPlaylistPath(self) -> str:
+        return self.__playlistPath
+
+    def close(self):
+        pass
+
+
+class LoadTestMixer:
+    def __init__(self):
+        self.volume = 0
+
+    def mute(self):
+        self.setVolume(0)
+
+    def getVolume(self) -> int:
+        return self.volume
+
+    def setVolume(self, volume: int):
+        self.volume = volume
+
+    def close(self):
+        pass
+
+
+def writePlaylist(dirName: str) -> str:
+    path = os.path.join(dirName, "playlist.m3u")
+    with open(path, "w") as f:
+        for i in range(STATIONS):
+            f.write("#EXTINF:-1,Station %d\n" % (i + 1))
+            f.write("http://127.0.0.1:8000/station%d\n" % (i + 1))
+    return path
+
+
+def randomCommand():
+    if random.random() < 0.7:
+        return VolumeCommand(random.randint(0, 99))
+    return ButtonCommand(random.choice([B1, B2, B3, B4]))
+
+
+def getProcessStats() -> str:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return "threads %d, context switches voluntary %d, involuntary %d" % (
+        len(os.listdir("/proc/self/task")), usage.ru_nvcsw, usage.ru_nivcsw)
+
+
+def run(count: int):
+    tmpDir = tempfile.mkdtemp(prefix="loadtest.")
+    mpv.MPVBase.executable = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakempv.py")
+    statefile.STATE_DIR = tmpDir
+    playlistPath = writePlaylist(tmpDir)
+    player.ExtConfig = lambda: LoadTestExtConfig(playlistPath)
+    player.Mixer = LoadTestMixer
+    player.getNetworkInfo = lambda: NetworkInfo("loadtest", "127.0.0.1", None, None)
+
+    # the loop of control.py
+    globalvariables.loop = EventLoop()
+    globalvariables.loop.start()
+    display = Display()
+    start = time.monotonic()
+    globalvariables.player = player.Player(display)
+    print("Player started in %.3fs" % (time.monotonic() - start))
+    print(getProcessStats())
+
+    reader = InputReader()
+    stats = {}
+    for i in range(count):
+        command = randomCommand()
+        reader.receiveQ.put(command)
+        start = time.monotonic()
+        reader.processCommand(globalvariables.player)
+        name = type(command).__name__
+        stats.setdefault(name, LatencyStats(name)).add(time.monotonic() - start)
+
+    for commandStats in stats.values():
+        print(commandStats.toString())
+    print(globalvariables.player.getKnobStats().toString())
+    print(globalvariables.player.getMPV().get_event_stats())
+    print(tracing.toString())
+    print(getProcessStats())
+    globalvariables.player.close()
+    globalvariables.loop.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s:%(message)s')
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COMMANDS)
@@ -1,3 +1,6 @@
+import logging
+import threading
+
 import alsaaudio
 
 from config import ALSA_CARD_INDEX
@@ -8,31 +11,105 @@ class AlsaError(Exception):
 
 
 class Mixer:
+    """
+    Keeps the ALSA mixer control open, reopens it after an error.
+    Volume changes are applied in a worker thread, only the latest pending volume gets written.
+    """
+
     def __init__(self):
         self.__name = 'Master'
         self.__kwargs = {'cardindex': ALSA_CARD_INDEX}
+        self.__mixer = None
+        # serializes access to the mixer control
+        self.__lock = threading.Lock()
+        # last values written, None = unknown
+        self.__volume = None
+        self.__unmuted = False
+        self.__condition = threading.Condition()
+        self.__pendingVolume = None
+        # incremented by each mute, volumes taken by the worker before are dropped
+        self.__muteCount = 0
+        self.__stopped = False
+        self.__thread = threading.Thread(target=self.__run, name="mixer")
+        self.__thread.setDaemon(True)
+        self.__thread.start()
         # muting at the beginning
         self.mute()
 
+    def close(self):
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+        self.__thread.join()
+
     def mute(self):
         # unfortunately on my soundcard muting mutes all playback controls, while unmuting unmutes only the specific control.
         # only setting volume to 0 instead
-        self.setVolume(0)
+        with self.__condition:
+            # no pending volume may override the muting
+            self.__pendingVolume = None
+            self.__muteCount += 1
+        self.__writeVolume(0)
 
     def getVolume(self) -> int:
-        try:
-            mixer = alsaaudio.Mixer(self.__name, **self.__kwargs)
-            volumes = mixer.getvolume()
-            # only the first channel, should be the same for all
-            return volumes[0]
-        except alsaaudio.ALSAAudioError as e:
-            raise AlsaError(str(e))
+        with self.__condition:
+            if self.__pendingVolume is not None:
+                return self.__pendingVolume
+        with self.__lock:
+            volumes = self.__call(lambda mixer: mixer.getvolume())
+        # only the first channel, should be the same for all
+        return volumes[0]
 
     def setVolume(self, volume: int):
-        try:
-            mixer = alsaaudio.Mixer(self.__name, **self.__kwargs)
-            channel = alsaaudio.MIXER_CHANNEL_ALL
-            mixer.setmute(0, channel)
-            mixer.setvolume(volume, channel)
-        except alsaaudio.ALSAAudioError as e:
-            raise AlsaError(str(e))
+        """
+        Returns immediately, the volume is written by the worker thread
+        """
+        with self.__condition:
+            self.__pendingVolume = volume
+            self.__condition.notify()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while self.__pendingVolume is None and not self.__stopped:
+                    self.__condition.wait()
+                if self.__stopped:
+                    return
+                volume = self.__pendingVolume
+                self.__pendingVolume = None
+                muteCount = self.__muteCount
+            try:
+                self.__writeVolume(volume, muteCount)
+            except AlsaError as e:
+                logging.error("Setting volume %d failed: %s" % (volume, str(e)))
+
+    def __writeVolume(self, volume: int, muteCount: int = None):
+        channel = alsaaudio.MIXER_CHANNEL_ALL
+        with self.__lock:
+            if muteCount is not None and muteCount != self.__muteCount:
+                # muted meanwhile
+                return
+            if not self.__unmuted:
+                self.__call(lambda mixer: mixer.setmute(0, channel))
+                self.__unmuted = True
+            if volume != self.__volume:
+                self.__call(lambda mixer: mixer.setvolume(volume, channel))
+                self.__volume = volume
+
+    def __call(self, operation):
+        """
+        Runs operation on the mixer control, reopening the control once on error.
+        Called with the lock held
+        """
+        for attempt in range(2):
+            try:
+                if self.__mixer is None:
+                    self.__mixer = alsaaudio.Mixer(self.__name, **self.__kwargs)
+                return operation(self.__mixer)
+            except alsaaudio.ALSAAudioError as e:
+                # stale control (e.g. card reset), the written values are unknown now
+                self.__mixer = None
+                self.__volume = None
+                self.__unmuted = False
+                if attempt == 1:
+                    raise AlsaError(str(e))
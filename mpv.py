@@ -25,7 +25,9 @@
 # ------------------------------------------------------------------------------
 
 import inspect
+import itertools
 import json
+import logging
 import os
 import select
 import socket
@@ -34,12 +36,34 @@ import sys
 import tempfile
 import threading
 import time
-from queue import Queue, Empty, Full
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from queue import Queue, Empty
 
 from config import IPC_SERVER_OPTION, AUDIO_DEV, MPV_LOG_FILE
+from eventdispatcher import EventDispatcher
+from socketwatcher import SocketWatcher
+
+try:
+    # optional faster json decoder
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 # The original 5secs increased to allow for slow mpv start after resume
 MPV_TIMEOUT_SECS = 10
+# period of checking the mpv process is still alive while waiting for its socket
+MPV_START_CHECK_SECS = 0.1
+# time for mpv to exit after the quit command before it gets killed
+MPV_STOP_TIMEOUT_SECS = 1
+# maximum number of commands waiting for their reply from mpv at the same time
+MAX_PENDING_REQUESTS = 64
+# initial size of the socket receive buffer, grows for larger messages
+READ_BUFFER_SIZE = 65536
+# legacy encodings tried for messages which are not valid UTF-8, czech stations
+LEGACY_ENCODINGS = ("cp1250",)
+# messages decoded with the learned legacy encoding of the stream
+METADATA_MARKER = b'"metadata"'
 
 
 class MPVError(Exception):
@@ -82,9 +106,17 @@ class MPVBase:
         "--no-video"
     ]
 
-    def __init__(self, window_id=None, debug=False):
+    def __init__(self, window_id=None, debug=False, loop=None):
         self.window_id = window_id
         self.debug = debug
+        # eventloop.EventLoop reading the socket, own reader thread if None
+        self._loop = loop
+        # stream (e.g. its path) the metadata currently come from
+        self._encoding_key = None
+        # stream -> learned legacy encoding of its metadata
+        self._stream_encodings = {}
+        # stream -> number of messages not valid in UTF-8 or the learned encoding
+        self._decode_failures = {}
 
         self._prepare_socket()
         self._prepare_process()
@@ -98,9 +130,6 @@ class MPVBase:
         self._stop_process()
         self._stop_socket()
 
-    def _thread_id(self):
-        return threading.get_ident()
-
     #
     # Process
     #
@@ -126,8 +155,11 @@ class MPVBase:
         if hasattr(self, "_proc"):
             try:
                 self._proc.terminate()
+                self._proc.wait(MPV_STOP_TIMEOUT_SECS)
             except ProcessLookupError:
                 pass
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
 
     #
     # Socket communication
@@ -144,24 +176,39 @@ class MPVBase:
         """Wait for the mpv process to create the unix socket and finish
            startup.
         """
-        # FIXME timeout to give up
-        while self.is_running():
-            time.sleep(0.1)
-
-            try:
+        deadline = time.monotonic() + MPV_TIMEOUT_SECS
+        # Watching the socket directory wakes us up as soon as mpv creates the
+        # socket. The watch is set up before the first connect attempt so that
+        # the creation cannot be missed.
+        watcher = SocketWatcher(self._sock_filename)
+        try:
+            while self.is_running():
                 self._sock = socket.socket(socket.AF_UNIX)
-                self._sock.connect(self._sock_filename)
-            except (FileNotFoundError, ConnectionRefusedError):
-                continue
-            else:
-                break
-
-        else:
+                try:
+                    self._sock.connect(self._sock_filename)
+                except FileNotFoundError:
+                    self._sock.close()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise MPVTimeoutError("mpv did not create its socket in time")
+                    watcher.wait(min(remaining, MPV_START_CHECK_SECS))
+                except ConnectionRefusedError:
+                    # socket created, not listening yet
+                    self._sock.close()
+                    if time.monotonic() > deadline:
+                        raise MPVTimeoutError("mpv did not accept connection in time")
+                    time.sleep(0.001)
+                else:
+                    return
             raise MPVProcessError("unable to start process")
+        finally:
+            watcher.close()
 
     def _stop_socket(self):
         """Clean up the socket.
         """
+        if hasattr(self, "_sock"):
+            self._sock.close()
         if hasattr(self, "_sock_filename"):
             try:
                 os.remove(self._sock_filename)
@@ -171,14 +218,34 @@ class MPVBase:
     def _prepare_thread(self):
         """Set up the queues for the communication threads.
         """
-        self._request_queue = Queue(1)
-        self._response_queues = {}
+        # Commands in flight, request_id -> (future, command). Replies are
+        # matched by the request_id mpv echoes back, so any number of threads
+        # can have their commands pending at the same time.
+        self._pending_requests = OrderedDict()
+        self._pending_lock = threading.Lock()
+        self._pending_slots = threading.BoundedSemaphore(MAX_PENDING_REQUESTS)
+        self._send_lock = threading.Lock()
+        self._new_request_id = itertools.count(1)
         self._event_queue = Queue()
         self._stop_event = threading.Event()
+        # _read_buf[_read_start:_read_end] holds the received data not processed
+        # yet, the part up to _read_scanned is known not to contain a newline.
+        self._read_buf = bytearray(READ_BUFFER_SIZE)
+        self._read_view = memoryview(self._read_buf)
+        self._read_start = self._read_end = self._read_scanned = 0
+        # socket registered in the event loop
+        self._reading = False
+        # writing to the pipe wakes the reader thread up from select
+        self._wakeup_fds = os.pipe() if self._loop is None else None
 
     def _start_thread(self):
-        """Start up the communication threads.
+        """Start up the communication threads. With an event loop the
+           socket is read by the loop thread instead of a reader thread.
         """
+        if self._loop is not None:
+            self._reading = True
+            self._loop.addReader(self._sock.fileno(), self._read_in_loop)
+            return
         self._thread = threading.Thread(target=self._reader)
         self._thread.start()
 
@@ -187,34 +254,89 @@ class MPVBase:
         """
         if hasattr(self, "_stop_event"):
             self._stop_event.set()
+        if getattr(self, "_reading", False):
+            # the socket must leave the selector before it gets closed
+            self._loop.runInLoopAndWait(self._stop_reading)
+        if getattr(self, "_wakeup_fds", None) is not None:
+            os.write(self._wakeup_fds[1], b"\0")
         if hasattr(self, "_thread"):
             self._thread.join()
+        if getattr(self, "_wakeup_fds", None) is not None:
+            for fd in self._wakeup_fds:
+                os.close(fd)
+            self._wakeup_fds = None
 
     def _reader(self):
         """Read the incoming json messages from the unix socket that is
            connected to the mpv process. Pass them on to the message handler.
         """
-        buf = b""
-        while not self._stop_event.is_set():
-            r, w, e = select.select([self._sock], [], [], 1)
-            if r:
-                b = self._sock.recv(1024)
-                if not b:
+        try:
+            while not self._stop_event.is_set():
+                r, w, e = select.select([self._sock, self._wakeup_fds[0]], [], [])
+                if self._sock in r and not self._read_available():
                     break
-                buf += b
-
-            newline = buf.find(b"\n")
-            while newline >= 0:
-                data = buf[:newline + 1]
-                buf = buf[newline + 1:]
-
-                if self.debug:
-                    sys.stderr.write("<<< " + data.decode("utf8", "replace"))
+        finally:
+            # nobody is going to answer the commands still in flight
+            self._fail_pending_requests(MPVCommunicationError("connection to mpv closed"))
 
-                message = self._parse_message(data)
-                self._handle_message(message)
-
-                newline = buf.find(b"\n")
+    def _read_in_loop(self):
+        """Called by the event loop whenever the socket is readable.
+        """
+        try:
+            if self._read_available():
+                return
+        except OSError as e:
+            logging.warning("Reading from mpv failed: " + str(e))
+        self._stop_reading()
+
+    def _stop_reading(self):
+        """Remove the socket from the event loop, in the loop thread.
+        """
+        if self._reading:
+            self._reading = False
+            self._loop.removeReader(self._sock.fileno())
+            # nobody is going to answer the commands still in flight
+            self._fail_pending_requests(MPVCommunicationError("connection to mpv closed"))
+
+    def _read_available(self):
+        """Receive the data waiting on the socket and handle the complete
+           messages. Return False if the connection has been closed.
+        """
+        buf = self._read_buf
+        if self._read_end == len(buf):
+            if self._read_start > 0:
+                # moving the incomplete message to the beginning
+                buf[:self._read_end - self._read_start] = buf[self._read_start:self._read_end]
+                self._read_end -= self._read_start
+                self._read_scanned -= self._read_start
+                self._read_start = 0
+            else:
+                # a single message larger than the buffer
+                self._read_view.release()
+                buf.extend(bytes(len(buf)))
+                self._read_view = memoryview(buf)
+        size = self._sock.recv_into(self._read_view[self._read_end:])
+        if not size:
+            return False
+        end = self._read_end = self._read_end + size
+
+        newline = buf.find(b"\n", self._read_scanned, end)
+        while newline >= 0:
+            data = buf[self._read_start:newline + 1]
+            # consumed before handling, a failing message is not handled again
+            self._read_start = newline + 1
+
+            if self.debug:
+                sys.stderr.write("<<< " + data.decode("utf8", "replace"))
+
+            message = self._parse_message(data)
+            self._handle_message(message)
+
+            newline = buf.find(b"\n", self._read_start, end)
+        self._read_scanned = end
+        if self._read_start == end:
+            self._read_start = self._read_end = self._read_scanned = 0
+        return True
 
     #
     # Message handling
@@ -229,22 +351,52 @@ class MPVBase:
     def _parse_message(self, data):
         """Return a message dictionary from a json representation.
         """
-        # XXX may be strict is too strict ;-)
-        data = self._decodeBytes(data)
-        return json.loads(data)
+        encoding = self._stream_encodings.get(self._encoding_key)
+        if encoding is not None and METADATA_MARKER in data:
+            # metadata of a stream known to use a legacy encoding. Strict UTF-8 still goes
+            # first, UTF-8 titles would decode as garbled legacy text too
+            try:
+                return json.loads(self._decodeBytes(bytes(data), (encoding,)))
+            except ValueError:
+                pass
+        try:
+            # the decoders parse UTF-8 bytes directly, no separate decoding pass
+            return _json_loads(data)
+        except ValueError:
+            # not UTF-8 (or not valid json), trying the legacy encodings
+            return json.loads(self._decodeBytes(bytes(data)))
 
-    def _decodeBytes(self, data):
+    def _decodeBytes(self, data, encodings=LEGACY_ENCODINGS):
         # unfortunately some internet streams transmit metadata in various encodings.
-        # this is a hook for czech stations
+        # this is a hook for czech stations, the encoding found is remembered for the stream
         try:
             return data.decode("utf8", "strict")
         except ValueError:
-            try:
-                # trying czech encoding
-                return data.decode("cp1250", "strict")
-            except ValueError:
-                # fallback to removing the offending characters
-                return data.decode("utf8", "replace")
+            key = self._encoding_key
+            self._decode_failures[key] = self._decode_failures.get(key, 0) + 1
+            for encoding in encodings:
+                try:
+                    text = data.decode(encoding, "strict")
+                    self._stream_encodings[key] = encoding
+                    return text
+                except ValueError:
+                    pass
+            # fallback to removing the offending characters
+            return data.decode("utf8", "replace")
+
+    def set_encoding_key(self, key):
+        """Set the stream (e.g. its path) the following messages come from.
+           Legacy encodings of metadata are learned per stream.
+        """
+        self._encoding_key = key
+
+    def get_decode_stats(self):
+        """Return a printable summary of the messages needing legacy
+           decoding, per stream.
+        """
+        return ", ".join("%s: %d failed UTF-8%s" % (
+            key, count, " (" + self._stream_encodings[key] + ")" if key in self._stream_encodings else "")
+                         for key, count in self._decode_failures.items()) or "no decode failures"
 
     def _handle_message(self, message):
         """Handle different types of incoming messages, i.e. responses to
@@ -252,68 +404,127 @@ class MPVBase:
         """
         if "error" in message:
             # This message is a reply to a request.
-            try:
-                thread_id = self._request_queue.get(timeout=1)
-            except Empty:
-                raise MPVCommunicationError("got a response without a pending request")
-
-            self._response_queues[thread_id].put(message)
+            pending = self._pop_pending_request(message.get("request_id"))
+            if pending is None:
+                # the requester has given up waiting already
+                return
+
+            future, command = pending
+            if message["error"] != "success":
+                future.set_exception(MPVCommandError("%r: %s" % (command, message["error"])))
+            else:
+                future.set_result(message.get("data"))
 
         elif "event" in message:
             # This message is an asynchronous event.
-            self._event_queue.put(message)
+            self._put_event(message)
 
         else:
             raise MPVCommunicationError("invalid message %r" % message)
 
+    def _pop_pending_request(self, request_id):
+        """Remove the pending request `request_id` from the table and return
+           its (future, command) pair, or None if it is not pending anymore.
+        """
+        with self._pending_lock:
+            if request_id is None:
+                # mpv without request_id support replies in the order of requests
+                if not self._pending_requests:
+                    return None
+                pending = self._pending_requests.popitem(last=False)[1]
+            else:
+                pending = self._pending_requests.pop(request_id, None)
+        if pending is not None:
+            self._pending_slots.release()
+        return pending
+
+    def _discard_request(self, future):
+        """Forget a pending request whose reply is no longer awaited.
+        """
+        with self._pending_lock:
+            for request_id, (pendingFuture, command) in self._pending_requests.items():
+                if pendingFuture is future:
+                    del self._pending_requests[request_id]
+                    break
+            else:
+                return
+        self._pending_slots.release()
+
+    def _fail_pending_requests(self, error):
+        """Resolve all pending requests with the exception `error`.
+        """
+        with self._pending_lock:
+            pending = list(self._pending_requests.values())
+            self._pending_requests.clear()
+        for future, command in pending:
+            self._pending_slots.release()
+            future.set_exception(error)
+
     def _send_message(self, message, timeout=None):
         """Send a message/command to the mpv process, message must be a
-           dictionary of the form {"command": ["arg1", "arg2", ...]}. Responses
-           from the mpv process must be collected using _get_response().
+           dictionary of the form {"command": ["arg1", "arg2", ...]}. Return
+           a future which is resolved with the command specific data once mpv
+           replies. The reply can be collected using _get_response().
         """
-        data = self._compose_message(message)
+        # Every message is tagged with a unique request_id which mpv returns in
+        # its reply. This makes it possible to use commands from several
+        # threads at once (e.g. fetch properties from event callbacks) without
+        # one slow command blocking the others.
+        if not self._pending_slots.acquire(timeout=timeout):
+            raise MPVTimeoutError("unable to put request")
+
+        request_id = next(self._new_request_id)
+        data = self._compose_message(dict(message, request_id=request_id))
 
         if self.debug:
             sys.stderr.write(">>> " + data.decode("utf8", "replace"))
 
-        # Request/response cycles are coordinated across different threads, so
-        # that they don't get mixed up. This makes it possible to use commands
-        # (e.g. fetch properties) from event callbacks that run in a different
-        # thread context.
-        thread_id = self._thread_id()
-        if thread_id not in self._response_queues:
-            # Prepare a response queue for the thread to wait on.
-            self._response_queues[thread_id] = Queue()
-
-        # Put the id of the current thread on the request queue. This id is
-        # later used to associate responses from the mpv process with this
-        # request.
-        try:
-            self._request_queue.put(thread_id, block=True, timeout=timeout)
-        except Full:
-            raise MPVTimeoutError("unable to put request")
+        future = Future()
+        with self._pending_lock:
+            self._pending_requests[request_id] = (future, message["command"])
 
         # Write the message data to the socket.
-        while data:
-            size = self._sock.send(data)
-            if size == 0:
-                raise MPVCommunicationError("broken sender socket")
-            data = data[size:]
-
-    def _get_response(self, timeout=None):
+        try:
+            with self._send_lock:
+                self._sock.sendall(data)
+        except OSError:
+            self._discard_request(future)
+            raise MPVCommunicationError("broken sender socket")
+        return future
+
+    def _get_response(self, future, timeout=None):
         """Collect the response message to a previous request. If there was an
            error a MPVCommandError exception is raised, otherwise the command
            specific data is returned.
         """
+        if self._loop is not None and self._loop.isLoopThread():
+            # nobody else reads the reply, the loop thread would wait for itself
+            self._read_until_done(future, timeout)
+            timeout = 0
         try:
-            message = self._response_queues[self._thread_id()].get(block=True, timeout=timeout)
-        except Empty:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            self._discard_request(future)
             raise MPVTimeoutError("unable to get response")
 
-        if message["error"] != "success":
-            raise MPVCommandError(message["error"])
-        else:
-            return message.get("data")
+    def _read_until_done(self, future, timeout=None):
+        """Read the socket in the loop thread until the future gets resolved
+           or the timeout passes. Handlers of the messages must not wait for
+           replies themselves.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not future.done() and self._reading:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            r, w, e = select.select([self._sock], [], [], remaining)
+            if r:
+                self._read_in_loop()
+
+    def _put_event(self, message):
+        """Queue an event message received from the mpv process.
+        """
+        self._event_queue.put(message)
 
     def _get_event(self, timeout=None):
         """Collect a single event message that has been received out-of-band
@@ -328,11 +539,8 @@ class MPVBase:
     def _send_request(self, message, timeout=None):
         """Send a command to the mpv process and collect the result.
         """
-        self._send_message(message, timeout)
-        try:
-            return self._get_response(timeout)
-        except MPVCommandError as e:
-            raise MPVCommandError("%r: %s" % (message["command"], e))
+        future = self._send_message(message, timeout)
+        return self._get_response(future, timeout)
 
     #
     # Public API
@@ -345,11 +553,13 @@ class MPVBase:
     def close(self):
         """Shutdown the mpv process and our communication setup.
         """
-        if self.is_running():
-            self._send_request({"command": ["quit"]}, timeout=1)
+        try:
+            if self.is_running():
+                self._send_request({"command": ["quit"]}, timeout=1)
+        finally:
             self._stop_process()
-        self._stop_thread()
-        self._stop_socket()
+            self._stop_thread()
+            self._stop_socket()
 
 
 class MPV(MPVBase):
@@ -375,25 +585,39 @@ class MPV(MPVBase):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._callbacks = {}
+        start = time.monotonic()
         self._property_serials = {}
         self._new_serial = iter(range(sys.maxsize))
+        # fetched from mpv once, on first use
+        self._property_list = None
 
         # Enumerate all methods and auto-register callbacks for
-        # events and property-changes.
-        for method_name, method in inspect.getmembers(self):
+        # events and property-changes. Only the names of the class attributes
+        # are scanned, the other attributes are not evaluated.
+        events = []
+        properties = []
+        for method_name in dir(type(self)):
+            if not method_name.startswith("on_") or method_name == "on_init":
+                continue
+            method = getattr(self, method_name)
             if not inspect.ismethod(method):
                 continue
 
             if method_name.startswith("on_property_"):
                 name = method_name[12:]
                 name = name.replace("_", "-")
-                self.register_property_callback(name, method)
+                properties.append((name, method))
 
-            elif method_name.startswith("on_"):
+            else:
                 name = method_name[3:]
                 name = name.replace("_", "-")
-                self.register_callback(name, method)
+                events.append((name, method))
+
+        # observed without on_property_ methods, sent in the same batch
+        properties.extend(self._get_extra_property_callbacks())
+        self.register_callbacks(events, properties)
+        self.setup_time = time.monotonic() - start
+        logging.debug("mpv callbacks set up in %.1f ms", 1000 * self.setup_time)
 
         # Simulate an init event when the process and all callbacks have been
         # completely set up.
@@ -403,46 +627,47 @@ class MPV(MPVBase):
     #
     # Socket communication
     #
+    def _prepare_thread(self):
+        """Set up the queues for the communication threads.
+        """
+        super()._prepare_thread()
+        # events can arrive as soon as the threads are running
+        self._callbacks = {}
+        self._event_dispatcher = EventDispatcher(self._get_event_callbacks, self._loop)
+
     def _start_thread(self):
         """Start up the communication threads.
         """
         super()._start_thread()
-        self._event_thread = threading.Thread(target=self._event_reader)
-        self._event_thread.start()
+        self._event_dispatcher.start()
 
     def _stop_thread(self):
         """Stop the communication threads.
         """
         super()._stop_thread()
-        if hasattr(self, "_event_thread"):
-            self._event_thread.join()
+        if hasattr(self, "_event_dispatcher"):
+            self._event_dispatcher.stop()
 
     #
     # Event/callback API
     #
-    def _event_reader(self):
-        """Collect incoming event messages and call the event handler.
+    def _put_event(self, message):
+        """Pass an event message to the dispatcher which coalesces repeated
+           property changes and calls the callbacks in its own thread.
         """
-        while not self._stop_event.is_set():
-            message = self._get_event(timeout=1)
-            if message is None:
-                continue
-
-            self._handle_event(message)
+        self._event_dispatcher.put(message)
 
-    def _handle_event(self, message):
-        """Lookup and call the callbacks for a particular event message.
+    def _get_event_callbacks(self, message):
+        """Lookup the callbacks for a particular event message. Return a list
+           of (event name, callback, arguments) tuples.
         """
         if message["event"] == "property-change":
             name = "property-" + message["name"]
         else:
             name = message["event"]
 
-        for callback in self._callbacks.get(name, []):
-            if "data" in message:
-                callback(message["data"])
-            else:
-                callback()
+        args = (message["data"],) if "data" in message else ()
+        return [(name, callback, args) for callback in list(self._callbacks.get(name, []))]
 
     def register_callback(self, name, callback):
         """Register a function `callback` for the event `name`.
@@ -468,6 +693,51 @@ class MPV(MPVBase):
         except ValueError:
             raise MPVError("callback %r not registered for event %r" % (callback, name))
 
+    def _get_extra_property_callbacks(self):
+        """Return a list of (property name, callback) pairs to observe at
+           startup in addition to the on_property_* methods. Override in
+           subclasses.
+        """
+        return []
+
+    def _get_property_list(self):
+        """Return the set of property names known to the mpv process.
+        """
+        if self._property_list is None:
+            self._property_list = frozenset(self.command("get_property", "property-list"))
+        return self._property_list
+
+    def register_callbacks(self, events, properties):
+        """Register several callbacks at once. `events` and `properties` are
+           lists of (name, callback) pairs for events and property-change
+           events. The enable_event/observe_property commands are sent in one
+           batch without waiting for the individual replies.
+        """
+        proplist = self._get_property_list()
+        for name, callback in properties:
+            if name not in proplist:
+                raise MPVError("no such property %r" % name)
+
+        # The callbacks must be in place before mpv starts sending the events.
+        commands = []
+        for name, callback in events:
+            self._callbacks.setdefault(name, []).append(callback)
+            commands.append(["enable_event", name])
+        for name, callback in properties:
+            self._callbacks.setdefault("property-" + name, []).append(callback)
+            serial = next(self._new_serial)
+            self._property_serials[(name, callback)] = serial
+            commands.append(["observe_property", serial, name])
+
+        futures = [self._send_message({"command": args}, MPV_TIMEOUT_SECS) for args in commands]
+        for args, future in zip(commands, futures):
+            try:
+                self._get_response(future, MPV_TIMEOUT_SECS)
+            except MPVCommandError:
+                if args[0] == "enable_event":
+                    raise MPVError("no such event %r" % args[1])
+                raise
+
     def register_property_callback(self, name, callback):
         """Register a function `callback` for the property-change event on
            property `name`.
@@ -477,8 +747,7 @@ class MPV(MPVBase):
 
         # XXX We manually have to check for the existence of the property name.
         # Apparently observe_property does not check it :-(
-        proplist = self.command("get_property", "property-list")
-        if name not in proplist:
+        if name not in self._get_property_list():
             raise MPVError("no such property %r" % name)
 
         self._callbacks.setdefault("property-" + name, []).append(callback)
@@ -510,11 +779,31 @@ class MPV(MPVBase):
     #
     # Public API
     #
+    def get_event_stats(self):
+        """Return a printable summary of the callback latencies and the
+           coalesced/dropped event counts.
+        """
+        return self._event_dispatcher.toString()
+
     def command(self, *args, timeout=MPV_TIMEOUT_SECS):
         """Execute a single command on the mpv process and return the result.
         """
         return self._send_request({"command": list(args)}, timeout=timeout)
 
+    def command_async(self, *args, timeout=MPV_TIMEOUT_SECS):
+        """Send a single command to the mpv process without waiting for its
+           reply. Return a future resolved with the result of the command.
+        """
+        return self._send_message({"command": list(args)}, timeout=timeout)
+
+    def command_batch(self, commands, timeout=MPV_TIMEOUT_SECS):
+        """Execute several commands at once, i.e. without waiting for the
+           reply of one command before sending the next. `commands` is a list
+           of argument lists. Return the list of results.
+        """
+        futures = [self._send_message({"command": list(args)}, timeout=timeout) for args in commands]
+        return [self._get_response(future, timeout) for future in futures]
+
     def get_property(self, name):
         """Return the value of property `name`.
         """
@@ -0,0 +1,76 @@
+import logging
+
+from mpv import MPVError
+from mympv import MyMPV
+
+# mpv options applied on every source activation unless the source overrides them
+DEFAULT_MPV_OPTIONS = {
+    # too long cache makes CD drive spin too long
+    "cache-default": "1000",
+}
+
+
+class MPVSession:
+    """
+    One long-lived mpv process shared by all sources.
+    Switching sources only resets the mpv state, the process is restarted only after a crash.
+    """
+
+    def __init__(self, player):
+        self.__player = player
+        self.__restarts = 0
+        self.__mpv = MyMPV(player)
+
+    def getMPV(self) -> MyMPV:
+        return self.__mpv
+
+    def swap(self, mpv: MyMPV) -> MyMPV:
+        """
+        Makes mpv (a standby instance of zap mode) the shared one
+        :return: the instance shared so far
+        """
+        previous = self.__mpv
+        self.__mpv = mpv
+        return previous
+
+    def getRestarts(self) -> int:
+        return self.__restarts
+
+    def reset(self, options: dict) -> MyMPV:
+        """
+        Prepare mpv for a newly activated source
+        :param options: mpv options of the source, applied on top of DEFAULT_MPV_OPTIONS
+        :return: the mpv instance to use
+        """
+        allOptions = dict(DEFAULT_MPV_OPTIONS)
+        allOptions.update(options)
+        if self.__mpv.is_running():
+            try:
+                self.__resetState(allOptions)
+                return self.__mpv
+            except MPVError as e:
+                logging.warning("Resetting mpv failed, restarting: " + str(e))
+        else:
+            logging.warning("mpv not running, restarting")
+        self.__restart(allOptions)
+        return self.__mpv
+
+    def __resetState(self, options: dict):
+        commands = [["stop"], ["playlist-clear"], ["set_property", "pause", False]]
+        for name, value in options.items():
+            commands.append(["set", "options/" + name, value])
+        self.__mpv.command_batch(commands)
+
+    def __restart(self, options: dict):
+        self.__restarts += 1
+        self.close()
+        self.__mpv = MyMPV(self.__player)
+        self.__resetState(options)
+
+    def close(self):
+        logging.debug("mpv metadata decoding: " + self.__mpv.get_decode_stats())
+        try:
+            self.__mpv.close()
+        except MPVError as e:
+            # crashed mpv cannot be closed cleanly
+            logging.warning("Closing mpv failed: " + str(e))
@@ -13,6 +13,15 @@ class MPVSource(Source):
     def __init__(self, display: Display, extConfig: ExtConfig, stateFile: StateFile, mixer: Mixer, player):
         super().__init__(display, extConfig, stateFile, mixer, player)
 
+    def _getMPVOptions(self) -> dict:
+        """
+        mpv options applied when the source gets activated
+        """
+        return {}
+
+    def _resetMPV(self):
+        return self._player.resetMPV(self._getMPVOptions())
+
     def togglePause(self):
         status = self.isPaused()
         if status is True:
@@ -21,8 +30,10 @@ class MPVSource(Source):
             self._player.getMPV().pause()
             # display is updated via event pause_changed
 
-    def isPaused(self) -> bool:
-        status = self._player.getMPV().get_property("pause")
+    def isPaused(self, cachedOnly: bool = False) -> bool:
+        if cachedOnly:
+            return self._player.getMPV().getCachedValue("pause") is not False
+        status = self._player.getMPV().getCachedProperty("pause")
         return status
 
     def _stopPlaying(self):
@@ -42,15 +53,8 @@ class MPVSource(Source):
 
     def metadata_changed(self, metadata: dict):
         if metadata is not None:
-            changed = False
-            if METADATA_NAME_FIELD in metadata:
-                name = metadata[METADATA_NAME_FIELD]
-                self._display.getScreen().setStation(name)
-                changed = True
-            if METADATA_TITLE_FIELD in metadata:
-                title = metadata[METADATA_TITLE_FIELD]
-                self._display.getScreen().setRadioTitle(title)
-                changed = True
-            if changed:
-                self._display.showScreen()
+            name = metadata.get(METADATA_NAME_FIELD)
+            title = metadata.get(METADATA_TITLE_FIELD)
+            if name is not None or title is not None:
+                self._display.showRadioMetadata(name, title)
 
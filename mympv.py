@@ -1,5 +1,8 @@
-from config import VOLUME_PROPERTY
+import globalvariables
+from config import VOLUME_PROPERTY, MPV_CACHED_PROPERTIES
 from mpv import MPV
+from propertycache import PropertyCache
+from tracing import stampMPVCommand, stampPlaybackRestart
 
 
 class MyMPV(MPV):
@@ -7,14 +10,31 @@ class MyMPV(MPV):
     # Initialization.
     # -------------------------------------------------------------------------
 
-    # The mpv process and the communication code run in their own thread
-    # context. This results in the callback methods below being run in that
-    # thread as well.
+    # The mpv socket is read in the event loop of control.py (own reader
+    # thread without the loop), the callback methods below are run by the
+    # event dispatcher in its worker threads.
     def __init__(self, player):
+        # callbacks can be called as soon as they get registered in super().__init__
+        self.__player = player
+        # filled from property-change events
+        self.__propertyCache = PropertyCache()
+        self.__cacheStateObserved = False
         # Pass a window id to embed mpv into that window. Change debug to True
         # to see the json communication.
-        super().__init__(window_id=None, debug=False)
-        self.__player = player
+        super().__init__(window_id=None, debug=False, loop=globalvariables.loop)
+
+    def _get_extra_property_callbacks(self):
+        # registered in the startup batch together with the callbacks
+        return [(name, self.__cacheOnly) for name in MPV_CACHED_PROPERTIES]
+
+    def _handle_message(self, message):
+        # updating the cache right away in the reading thread, callbacks get called later by the dispatcher
+        if message.get("event") == "property-change":
+            self.__propertyCache.update(message["name"], message.get("data"))
+            if message["name"] == "path":
+                # metadata encodings are learned per stream
+                self.set_encoding_key(message.get("data"))
+        super()._handle_message(message)
 
     # -------------------------------------------------------------------------
     # Callbacks
@@ -24,30 +44,122 @@ class MyMPV(MPV):
     # "time-pos" -> on_property_time_pos().
 
     def on_property_chapter(self, chapter=None):
-        source = self.__player.getSelectedSource()
-        source.chapterWasChanged(chapter)
+        source = self.__getSource()
+        if source is not None:
+            source.chapterWasChanged(chapter)
 
     def on_property_metadata(self, metadata=None):
-        source = self.__player.getSelectedSource()
-        source.metadata_changed(metadata)
+        source = self.__getSource()
+        if source is not None:
+            source.metadata_changed(metadata)
 
     def on_property_pause(self, pause=None):
+        source = self.__getSource()
+        if source is not None:
+            source.pause_changed(pause)
+
+    def on_property_playlist_pos(self, pos=None):
+        source = self.__getSource()
+        if source is not None:
+            source.playlistPosChanged(pos)
+
+    def on_property_core_idle(self, idle=None):
+        source = self.__getSource()
+        if source is not None:
+            source.coreIdleChanged(idle)
+
+    def on_property_idle_active(self, idle=None):
+        self.__playbackStateChanged("idle-active", idle)
+
+    def on_property_paused_for_cache(self, paused=None):
+        self.__playbackStateChanged("paused-for-cache", paused)
+
+    def __onCacheState(self, state=None):
+        self.__playbackStateChanged("demuxer-cache-state", state)
+
+    def setCacheStateObserved(self, observed: bool):
+        """
+        demuxer-cache-state changes often and carries a large dict, observed only while a stream is supervised
+        """
+        if observed != self.__cacheStateObserved:
+            if observed:
+                self.register_property_callback("demuxer-cache-state", self.__onCacheState)
+            else:
+                self.unregister_property_callback("demuxer-cache-state", self.__onCacheState)
+            self.__cacheStateObserved = observed
+
+    def __playbackStateChanged(self, name: str, value):
+        source = self.__getSource()
+        if source is not None:
+            source.playbackStateChanged(name, value)
+
+    # events:
+    # "end-file" -> on_end_file().
+
+    def on_playback_restart(self):
+        if self.__player.getMPV() is self:
+            stampPlaybackRestart()
+
+    def on_end_file(self):
+        source = self.__getSource()
+        if source is not None:
+            source.fileEnded()
+
+    def __getSource(self):
         source = self.__player.getSelectedSource()
-        source.pause_changed(pause)
+        # standby instances (zap mode) do not drive the source
+        if source is None or self.__player.getMPV() is not self:
+            return None
+        return source
+
+    def __cacheOnly(self, value=None):
+        # the value is stored in the property cache already
+        pass
+
+    # -------------------------------------------------------------------------
+    # Properties
+    # -------------------------------------------------------------------------
+    def getCachedProperty(self, name: str):
+        """
+        Value of an observed property from the local cache, without IPC round-trip.
+        Falls back to asking mpv while the property is unknown/unavailable.
+        """
+        value = self.__propertyCache.getValue(name)
+        if value is not None:
+            return value
+        return self.get_property(name)
+
+    def getCachedValue(self, name: str):
+        """
+        Value of an observed property from the local cache, None while unknown/unavailable. No IPC
+        """
+        return self.__propertyCache.getValue(name)
+
+    def getAvoidedIPCCount(self) -> int:
+        return self.__propertyCache.getHits()
 
     # -------------------------------------------------------------------------
     # Commands
     # -------------------------------------------------------------------------
+    def command(self, *args, **kwargs):
+        result = super().command(*args, **kwargs)
+        stampMPVCommand(args)
+        return result
+
     # Many commands must be implemented by changing properties.
     def play(self):
         self.set_property("pause", False)
+        self.__propertyCache.update("pause", False)
 
     def pause(self):
         self.set_property("pause", True)
+        self.__propertyCache.update("pause", True)
 
     def setVolume(self, volume: int):
         try:
-            self.set_property(VOLUME_PROPERTY, int(volume))
+            # not waiting for the reply
+            self.command_async("set_property", VOLUME_PROPERTY, int(volume))
+            stampMPVCommand(("set_property", VOLUME_PROPERTY))
         except:
             # not running, no problem
             pass
@@ -1,11 +1,14 @@
+from typing import Iterable
+
 from abstractscreen import AbstractScreen
 from abstractwriter import AbstractWriter
+from tracing import Trace
 
 
 class OutputWriter(AbstractWriter):
 
-    def handleItem(self, item: str):
+    def handleItem(self, item: str) -> None:
         print("SCREEN: " + item + "\n")
 
-    def output(self, screen: 'AbstractScreen'):
-        self.sendQ.put(screen.toString())
+    def output(self, screen: 'AbstractScreen', traces: Iterable[Trace] = ()):
+        self._put(screen.id, screen.toString(), traces)
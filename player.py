@@ -2,13 +2,16 @@ import logging
 import time
 from itertools import cycle
 
+import tracing
 from abstractplayer import AbstractPlayer
 from buttoncommand import B1, B5
 from cdsource import CDSource
 from display import Display
 from extconfig import ExtConfig
 from flashsource import FlashSource
+from latencystats import LatencyStats
 from mixer import Mixer
+from mpvsession import MPVSession
 from mympv import MyMPV
 from networkinfo import getNetworkInfo, NetworkInfo
 from radiosource import RadioSource
@@ -29,8 +32,10 @@ class Player(AbstractPlayer):
         self.__display = display
         self.__showInitInfo()
         self.__cdIsOver = False
-        self.__mpv = MyMPV(self)
         self.__selectedSource = None
+        self.__switchStats = LatencyStats("source switch")
+        self.__knobStats = LatencyStats("knob to volume")
+        self.__mpvSession = MPVSession(self)
         self.__extConfig = self.__initExtConfig()
         # initial mute - arduino will send proper volumecommand
         # initial mute - arduino will send proper volumecommand
@@ -70,11 +75,18 @@ class Player(AbstractPlayer):
             self.switch()
         else:
             if (self.__selectedSource is not None):
+                tracing.stamp(tracing.SOURCE)
                 self.__selectedSource.handleButton(button)
 
-    def setVolume(self, volume: int):
+    def setVolume(self, volume: int, created: float = None):
         if (self.__selectedSource is not None):
+            tracing.stamp(tracing.SOURCE)
             self.__selectedSource.setVolume(volume)
+        if created is not None:
+            self.__knobStats.add(time.monotonic() - created)
+
+    def getKnobStats(self) -> LatencyStats:
+        return self.__knobStats
 
     def __initExtConfig(self) -> ExtConfig:
         try:
@@ -92,6 +104,10 @@ class Player(AbstractPlayer):
         if (nextAvailableSource is not None):
             self.__switchToSource(nextAvailableSource)
 
+    def switchFrom(self, source):
+        if self.__selectedSource is source:
+            self.switch()
+
     def __findNextAvailableSource(self):
         for i in range(0, len(self.__sources)):
             source = next(self.__ringSources)
@@ -100,35 +116,53 @@ class Player(AbstractPlayer):
         return None
 
     def __switchToSource(self, source):
+        start = time.monotonic()
         if self.__selectedSource is not None:
             self.__selectedSource.deactivate()
         self.__selectedSource = source
+        tracing.stamp(tracing.SOURCE)
         source.activate()
+        self.__switchStats.add(time.monotonic() - start)
+        logging.debug(self.__switchStats.toString() + ", mpv restarts: " + str(self.__mpvSession.getRestarts()))
 
     def close(self):
+        logging.debug(self.__knobStats.toString())
         self.__display.showInfo("The control software is shut down")
         self.__mixer.mute()
-        self.__mpv.close()
+        self.__mixer.close()
+        for source in self.__sources:
+            source.close()
+        self.__mpvSession.close()
         self.__display.close()
         self.__extConfig.close()
 
     def getMPV(self) -> MyMPV:
-        return self.__mpv
-
-    def restartMPV(self):
-        if self.__mpv is not None:
-            self.__mpv.close()
-        self.__mpv = MyMPV(self)
+        return self.__mpvSession.getMPV()
+
+    def resetMPV(self, options: dict) -> MyMPV:
+        """
+        Prepares the shared mpv for a newly activated source
+        :param options: source-specific mpv options
+        """
+        return self.__mpvSession.reset(options)
+
+    def swapMPV(self, mpv: MyMPV) -> MyMPV:
+        """
+        Makes the standby mpv the shared one
+        :return: the mpv shared so far
+        """
+        return self.__mpvSession.swap(mpv)
 
     def getSelectedSource(self) -> Source:
         return self.__selectedSource
 
-    def isPaused(self) -> bool:
+    def isPaused(self, cachedOnly: bool = False) -> bool:
         if self.__selectedSource is not None:
-            return self.__selectedSource.isPaused()
+            return self.__selectedSource.isPaused(cachedOnly)
         else:
             return True
 
     def isCDInserted(self) -> bool:
-        return self.__cdSource.isCDInserted()
+        # kept up to date by the udev events, no device lookup
+        return self.__cdSource.isAvailable()
 
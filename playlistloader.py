@@ -0,0 +1,101 @@
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from threading import Thread, Event, Lock
+
+from typing import Iterator
+
+from mpv import MPVError
+
+
+class PlaylistLoader(Thread):
+    """
+    Appends files to the mpv playlist in background.
+    The loadfile commands are pipelined, the loader does not wait for each reply.
+    """
+
+    def __init__(self, mpv, paths: Iterator[Path]):
+        super().__init__()
+        self.__mpv = mpv
+        self.__paths = paths
+        self.__cancelled = Event()
+        self.setDaemon(True)
+
+    def cancel(self):
+        self.__cancelled.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        start = time.monotonic()
+        count = 0
+        futures = deque()
+        try:
+            for path in self.__paths:
+                if self.__cancelled.is_set():
+                    break
+                futures.append(self.__mpv.command_async("loadfile", str(path), "append"))
+                count += 1
+                # checking replies received so far
+                while futures and futures[0].done():
+                    futures.popleft().result()
+            for future in futures:
+                future.result()
+            logging.debug("Appended %d files to mpv playlist in %.3fs", count, time.monotonic() - start)
+        except MPVError as e:
+            logging.error("Appending files to mpv playlist failed: " + str(e))
+
+
+class PlaylistWindow:
+    """
+    Keeps only the current track and the next `size` tracks in the mpv playlist.
+    The window is refilled lazily from the paths iterator as the playback advances,
+    played tracks are removed, so the memory use does not depend on the number of files.
+    """
+
+    def __init__(self, mpv, paths: Iterator[Path], size: int, queued: int):
+        """
+        :param queued: number of tracks already loaded into the mpv playlist
+        """
+        self.__mpv = mpv
+        self.__paths = paths
+        self.__size = size
+        self.__lock = Lock()
+        # tracks in the mpv playlist
+        self.__count = queued
+        self.__cancelled = False
+
+    def cancel(self):
+        with self.__lock:
+            self.__cancelled = True
+
+    def refill(self):
+        """
+        Drops the already played tracks and appends new ones up to the window size.
+        Called whenever the playlist position changes or a file ends.
+        """
+        with self.__lock:
+            if self.__cancelled:
+                return
+            try:
+                # the property-change event may be outdated by removals done meanwhile, asking mpv
+                pos = self.__mpv.get_property("playlist-pos")
+            except MPVError:
+                # no current track
+                return
+            if pos is None or pos < 0:
+                return
+            commands = [["playlist-remove", 0] for i in range(pos)]
+            self.__count -= pos
+            while self.__count <= self.__size:
+                path = next(self.__paths, None)
+                if path is None:
+                    break
+                commands.append(["loadfile", str(path), "append"])
+                self.__count += 1
+            if commands:
+                try:
+                    self.__mpv.command_batch(commands)
+                except MPVError as e:
+                    logging.error("Refilling mpv playlist failed: " + str(e))
@@ -0,0 +1,50 @@
+import threading
+
+
+class PropertyCache:
+    """
+    Thread-safe local mirror of observed mpv properties.
+    Filled from property-change events, every update increments the version.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # name -> (value, version)
+        self.__values = {}
+        self.__version = 0
+        self.__hits = 0
+        self.__misses = 0
+
+    def update(self, name: str, value) -> int:
+        with self.__lock:
+            self.__version += 1
+            self.__values[name] = (value, self.__version)
+            return self.__version
+
+    def getValue(self, name: str):
+        """
+        :return: cached value of the property, None if not known (not observed yet or unavailable in mpv)
+        """
+        with self.__lock:
+            value, version = self.__values.get(name, (None, 0))
+            if value is not None:
+                self.__hits += 1
+            else:
+                self.__misses += 1
+            return value
+
+    def getVersion(self, name: str) -> int:
+        """
+        :return: version of the last update of the property, 0 if never updated
+        """
+        with self.__lock:
+            return self.__values.get(name, (None, 0))[1]
+
+    def getHits(self) -> int:
+        """
+        :return: number of reads served from the cache, i.e. IPC round-trips avoided
+        """
+        return self.__hits
+
+    def getMisses(self) -> int:
+        return self.__misses
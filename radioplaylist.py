@@ -0,0 +1,72 @@
+import logging
+import os
+
+from typing import List, Optional
+
+from abstractscreen import FONT4_MAXCHARS, wrapText
+from radioscreen import STATION_MAXLINES
+
+EXTINF_TAG = "#EXTINF:"
+
+
+class Station:
+    __slots__ = ('url', 'title', 'lines')
+
+    def __init__(self, url: str, title: Optional[str]):
+        self.url = url
+        self.title = title
+        # station lines of the radio screen, None without title
+        self.lines = wrapText(title, FONT4_MAXCHARS, STATION_MAXLINES) if title else None
+
+
+def parsePlaylist(path: str) -> List[Station]:
+    """
+    Stations of the m3u file, titled by the preceding #EXTINF lines
+    """
+    stations = []
+    title = None
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(EXTINF_TAG):
+                # #EXTINF:duration,title
+                title = line.partition(",")[2].strip() or None
+            elif not line.startswith("#"):
+                stations.append(Station(line, title))
+                title = None
+    return stations
+
+
+class RadioPlaylist:
+    """
+    Index of the radio playlist, parsed once and parsed again only after the file was modified
+    """
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__mtime = None
+        self.__stations = []
+
+    def refresh(self) -> bool:
+        """
+        :return: True if the stations were (re)loaded
+        """
+        try:
+            mtime = os.stat(self.__path).st_mtime_ns
+        except OSError as e:
+            logging.warning("Cannot read radio playlist: " + str(e))
+            return False
+        if mtime == self.__mtime:
+            return False
+        self.__stations = parsePlaylist(self.__path)
+        self.__mtime = mtime
+        logging.debug("Loaded %d radio stations from %s" % (len(self.__stations), self.__path))
+        return True
+
+    def getCount(self) -> int:
+        return len(self.__stations)
+
+    def getStation(self, pos: int) -> Station:
+        return self.__stations[pos]
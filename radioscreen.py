@@ -1,39 +1,65 @@
 from collections import deque
-from struct import pack
+from struct import Struct
+
+from typing import Tuple
 
 from abstractscreen import AbstractScreen, FONT2_MAXCHARS, FONT4_MAXCHARS
 
 TITLE_MAXLINES = 2
 STATION_MAXLINES = 2
+# shown instead of the title while the stream is reconnecting
+BUFFERING_LINES = ("Buffering...", "")
 
 ID = 6
 # ID station1 station2 title1 title2 playing cd-available
 FMT = 'b' + ' ' + str(FONT4_MAXCHARS + 1) + 's' + ' ' + str(FONT4_MAXCHARS + 1) + 's' + ' ' \
       + str(FONT2_MAXCHARS + 1) + 's' + ' ' + str(FONT2_MAXCHARS + 1) + 's' + ' b b'
+STRUCT = Struct(FMT)
 
 
 class RadioScreen(AbstractScreen):
+    __slots__ = ('titleLines', 'stationLines', 'buffering')
+
     def __init__(self):
         super().__init__(ID)
         self.titleLines = deque(maxlen=TITLE_MAXLINES)
         self.stationLines = deque(maxlen=STATION_MAXLINES)
+        self.buffering = False
         self.clearLines(self.stationLines)
         self.clearLines(self.titleLines)
 
     def clearLines(self, lines: deque):
-        lines.clear()
-        lines.append("")
-        lines.append("")
+        if len(lines) != 2 or lines[0] or lines[1]:
+            lines.clear()
+            lines.append("")
+            lines.append("")
+            self._dirty = True
 
     def setStation(self, station: str):
         self._setLines(station, self.stationLines, FONT4_MAXCHARS, STATION_MAXLINES)
         self.clearLines(self.titleLines)
 
+    def setStationLines(self, lines: Tuple[str, ...]):
+        """
+        Station already wrapped to the station lines
+        """
+        self._replaceLines(self.stationLines, lines)
+        self.clearLines(self.titleLines)
+
     def setRadioTitle(self, title: str):
         self._setLines(title, self.titleLines, FONT2_MAXCHARS, TITLE_MAXLINES)
         return self
 
-    def getSerialMsg(self) -> bytes:
-        return pack(FMT, self.id, bytes(self.stationLines[0], 'utf-8'), bytes(self.stationLines[1], 'utf-8'),
-                    bytes(self.titleLines[0], 'utf-8'), bytes(self.titleLines[1], 'utf-8'), self.getIconCode(),
-                    self.isCDAvailable())
+    def setBuffering(self, buffering: bool):
+        if buffering != self.buffering:
+            self.buffering = buffering
+            self._dirty = True
+        return self
+
+    def _getMsgKey(self) -> tuple:
+        return self.getIconCode(), self.isCDAvailable()
+
+    def _pack(self, key: tuple) -> bytes:
+        titleLines = BUFFERING_LINES if self.buffering else self.titleLines
+        return STRUCT.pack(self.id, bytes(self.stationLines[0], 'utf-8'), bytes(self.stationLines[1], 'utf-8'),
+                           bytes(titleLines[0], 'utf-8'), bytes(titleLines[1], 'utf-8'), *key)
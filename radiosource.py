@@ -1,25 +1,53 @@
+import logging
+import time
+
+from config import RADIO_ZAP_MODE, RADIO_SKIP_DEAD_STATIONS
 from display import Display
 from extconfig import ExtConfig
+from latencystats import LatencyStats
 from mixer import Mixer
-from mpvsource import MPVSource
+from mpvsource import MPVSource, METADATA_NAME_FIELD
+from radioplaylist import RadioPlaylist
 from statefile import DEFAULT_PLIST_POS, StateFile
+from stationprober import StationProber
+from stationzapper import StationZapper
+from streamsupervisor import StreamSupervisor
 
 
 class RadioSource(MPVSource):
+    """
+    Stations are navigated in the playlist index, mpv gets one stream URL at a time
+    """
+
     def __init__(self, display: Display, extConfig: ExtConfig, stateFile: StateFile, mixer: Mixer, player):
         super().__init__(display, extConfig, stateFile, mixer, player)
+        self.__playlist = RadioPlaylist(extConfig.getPlaylistPath())
         self.__plistPos = stateFile.getPlistPos()
+        self.__zapper = StationZapper(player, self.__playlist) if RADIO_ZAP_MODE else None
+        self.__prober = StationProber(stateFile.getDir()) if RADIO_SKIP_DEAD_STATIONS else None
+        # station switch waiting for the audio to start
+        self.__switchStart = None
+        self.__switchStats = LatencyStats("station switch to audio")
+        self.__supervisor = StreamSupervisor(player, display)
+        self.__supervisor.start()
 
     def _displaySelf(self) -> None:
         self._display.setRadioScreen()
+        self._display.showScreen()
 
     def _start(self) -> None:
-        self._player.restartMPV()
-        mpv = self._player.getMPV()
-        mpv.command("loadlist", self._extConfig.getPlaylistPath())
-        mpv.play()
+        self._resetMPV()
+        self.__setStoredPlistPos()
+
+    def _stopPlaying(self):
+        self.__supervisor.unwatch()
+        self._player.getMPV().setCacheStateObserved(False)
+        super()._stopPlaying()
+        if self.__zapper is not None:
+            self.__zapper.stop()
 
     def __setStoredPlistPos(self):
+        self.__refreshPlaylist(probe=True)
         self.__plistPos = self.__getStoredPlistPos()
         self.__setPlaylistPosition(self.__plistPos)
 
@@ -30,32 +58,105 @@ class RadioSource(MPVSource):
         return plistPos
 
     def __setPlaylistPosition(self, plistPos):
-        self._player.getMPV().set_property("playlist-pos", plistPos)
+        if self.__getPlaylistCount() == 0:
+            self._display.showError("No radio stations")
+            return
+        self.__switchStart = time.monotonic()
+        station = self.__playlist.getStation(plistPos)
+        if station.lines is not None:
+            # painted right away, the stream metadata come later
+            self._display.showRadioStation(station.lines)
+        self.__supervisor.watch(station.url)
+        if self.__zapper is not None:
+            if self.__zapper.play(plistPos):
+                # the swapped in stream is playing already, its metadata do not change now.
+                # Loaded streams get theirs from the property change
+                metadata = self._player.getMPV().getCachedValue("metadata")
+                if metadata is not None:
+                    self.metadata_changed(metadata)
+        else:
+            self._player.getMPV().command("loadfile", station.url)
+        # the instance playing now, also after a zap swap
+        self._player.getMPV().setCacheStateObserved(True)
         self._stateFile.storePlistPos(plistPos)
 
+    def __refreshPlaylist(self, probe: bool = False):
+        """
+        :param probe: check the stations also if the playlist did not change, e.g. on activation
+        """
+        if self.__playlist.refresh():
+            if self.__zapper is not None:
+                # prebuffered positions are not valid anymore
+                self.__zapper.stop()
+            probe = True
+        if probe and self.__prober is not None:
+            # only stations without a valid result get checked
+            self.__prober.probe(self.__playlist.getStation(pos).url for pos in range(self.__getPlaylistCount()))
+
+    def __isDead(self, plistPos: int) -> bool:
+        return self.__prober is not None and self.__prober.isDead(self.__playlist.getStation(plistPos).url)
+
     def __getPlaylistCount(self):
-        positions = self._player.getMPV().get_property("playlist-count")
-        return positions
+        return self.__playlist.getCount()
+
+    def metadata_changed(self, metadata: dict):
+        if metadata is not None and METADATA_NAME_FIELD in metadata and self.__hasStationTitle():
+            # the playlist title is shown instead of the stream name
+            metadata = dict(metadata)
+            del metadata[METADATA_NAME_FIELD]
+        super().metadata_changed(metadata)
+
+    def __hasStationTitle(self) -> bool:
+        return 0 <= self.__plistPos < self.__getPlaylistCount() and \
+               self.__playlist.getStation(self.__plistPos).title is not None
+
+    def pause_changed(self, pause: bool):
+        super().pause_changed(pause)
+        self.__supervisor.stateChanged("pause", pause)
+
+    def playbackStateChanged(self, name: str, value):
+        self.__supervisor.stateChanged(name, value)
+
+    def coreIdleChanged(self, idle: bool):
+        self.__supervisor.stateChanged("core-idle", idle)
+        if idle is False and self.__switchStart is not None:
+            self.__switchStats.add(time.monotonic() - self.__switchStart)
+            self.__switchStart = None
+            logging.debug(self.__switchStats.toString())
+
+    def getSwitchStats(self) -> LatencyStats:
+        return self.__switchStats
+
+    def getRecoveryStats(self) -> LatencyStats:
+        return self.__supervisor.getRecoveryStats()
 
     def next(self) -> None:
         self.__nextRadioStream()
 
     def __nextRadioStream(self):
+        self.__refreshPlaylist()
         count = self.__getPlaylistCount()
-        if self.__plistPos < (count - 1):
-            self.__plistPos += 1
-        else:
-            # rollover
-            self.__plistPos = 0
+        for i in range(count):
+            if self.__plistPos < (count - 1):
+                self.__plistPos += 1
+            else:
+                # rollover
+                self.__plistPos = 0
+            if not self.__isDead(self.__plistPos):
+                break
         self.__setPlaylistPosition(self.__plistPos)
 
     def __prevRadioStream(self):
+        self.__refreshPlaylist()
         positions = self.__getPlaylistCount()
-        if self.__plistPos > 0:
-            self.__plistPos -= 1
-        else:
-            # rollover
-            self.__plistPos = positions - 1
+        for i in range(positions):
+            if 0 < self.__plistPos < positions:
+                self.__plistPos -= 1
+            else:
+                # rollover
+                self.__plistPos = positions - 1
+            if not self.__isDead(self.__plistPos):
+                break
         self.__setPlaylistPosition(self.__plistPos)
 
     def prev(self) -> None:
@@ -63,3 +164,11 @@ class RadioSource(MPVSource):
 
     def isAvailable(self) -> bool:
         return True
+
+    def close(self):
+        logging.debug(self.__switchStats.toString())
+        self.__supervisor.close()
+        if self.__zapper is not None:
+            self.__zapper.close()
+        if self.__prober is not None:
+            self.__prober.close()
@@ -1,15 +1,14 @@
 import logging
 
-from serial import Serial
+from serial import Serial, SerialException
+from typing import Callable
 
-from abstractreader import AbstractReader, INPUT_VOLUME_ID, INPUT_BUTTON_ID, INPUT_LOG_ID
+from abstractreader import AbstractReader, INPUT_VOLUME_ID, INPUT_BUTTON_ID, INPUT_LOG_ID, INPUT_ACK_ID
 from buttoncommand import ButtonCommand
+from eventloop import EventLoop
+from frameparser import FrameParser
 from volumecommand import VolumeCommand
 
-# defined in arduino!
-FRAME_START = 254
-FRAME_STOP = 253
-
 
 class SerialReader(AbstractReader):
     def __init__(self, ser: Serial):
@@ -17,63 +16,79 @@ class SerialReader(AbstractReader):
         super().__init__()
         self.__serial = ser
         self.__serial.flushInput()
+        self.__parser = FrameParser()
+        self.__ackHandler = None
+        self.__loop = None
+
+    def setAckHandler(self, ackHandler: Callable[[int, int], None]):
+        """
+        :param ackHandler: called with screen ID and version of each frame acknowledged by arduino
+        """
+        self.__ackHandler = ackHandler
+
+    def attach(self, loop: EventLoop):
+        """
+        Reads in the event loop whenever data arrive, instead of starting the reader thread
+        """
+        self.__loop = loop
+        loop.addReader(self.__serial.fileno(), self.readAvailable)
 
     def stop(self):
         super().stop()
+        self.__detach()
         if self.__serial.isOpen():
             self.__serial.flushInput()
             self.__serial.close()
 
     def readFrame(self):
-        frameStart = self.__serial.read(1)
-        if frameStart[0] == FRAME_START:
-            frameType = self.__serial.read(1)
-            if frameType == INPUT_VOLUME_ID:
-                self.__readVolume()
-            if frameType == INPUT_BUTTON_ID:
-                self.__readButton()
-            if frameType == INPUT_LOG_ID:
-                self.__readLog()
-        else:
-            logging.warning("Skipping unknown FRAME_START: " + str(frameStart[0]))
+        # blocking for the first byte, then taking all bytes already received
+        data = self.__serial.read(1)
+        waiting = self.__serial.inWaiting()
+        if waiting > 0:
+            data += self.__serial.read(waiting)
+        self.__handleData(data)
+
+    def readAvailable(self):
+        """
+        Called by the event loop when the port is readable, does not block
+        """
+        try:
+            # readable port with nothing waiting is closed, read raises then
+            data = self.__serial.read(max(1, self.__serial.inWaiting()))
+        except SerialException as e:
+            logging.error("Serial port failed, stopped reading: " + str(e))
+            self.__detach()
+            return
+        self.__handleData(data)
 
-    def __readVolume(self):
-        volume = self.__serial.read(1)
-        frameStop = self.__serial.read(1)
-        if frameStop[0] == FRAME_STOP:
-            # OK
-            self.receiveQ.put(VolumeCommand(volume[0]))
-        else:
-            logging.warning("Skipping unknown FRAME_STOP: " + str(frameStop[0]))
+    def __detach(self):
+        if self.__loop is not None and self.__serial.isOpen():
+            self.__loop.removeReader(self.__serial.fileno())
+            self.__loop = None
 
-    def __readButton(self):
-        button = self.__serial.read(1)
-        frameStop = self.__serial.read(1)
-        if frameStop[0] == FRAME_STOP:
-            # OK
-            self.receiveQ.put(ButtonCommand(button[0]))
-        else:
-            logging.warning("Skipping unknown FRAME_STOP: " + str(frameStop[0]))
+    def __handleData(self, data: bytes):
+        skippedBytes = self.__parser.skippedBytes
+        commands = []
+        for frameType, payload in self.__parser.feed(data):
+            if frameType == INPUT_VOLUME_ID[0]:
+                commands.append(VolumeCommand(payload[0]))
+            elif frameType == INPUT_BUTTON_ID[0]:
+                commands.append(ButtonCommand(payload[0]))
+            elif frameType == INPUT_ACK_ID[0]:
+                if self.__ackHandler is not None:
+                    self.__ackHandler(payload[0], payload[1])
+            elif frameType == INPUT_LOG_ID[0]:
+                self.__log(payload)
+        if self.__parser.skippedBytes > skippedBytes:
+            logging.warning("Skipped %d bytes outside of frames" % (self.__parser.skippedBytes - skippedBytes))
+        if commands:
+            self._putCommands(commands)
 
-    def __readLog(self):
-        count = 0
-        error = False
-        msg = ''
-        while True:
-            character = self.__serial.read(1)
-            if character[0] == FRAME_STOP:
-                break
-            count += 1
-            if count > 100:
-                logging.warning("Skipping - no FRAME_STOP read while reading log contents")
-                error = True
-                break
-            try:
-                msg += character.decode('utf-8')
-            except Exception:
-                logging.error("Received non-ascii character " + str(character) + "in log message " + msg)
-                error = True
-                break
-        if not error:
-            # not using the queue, logging directly
-            logging.debug("Arduino log: " + msg)
+    def __log(self, payload: bytes):
+        try:
+            msg = payload.decode('utf-8')
+        except UnicodeDecodeError:
+            logging.error("Received non-ascii characters in log message " + str(payload))
+            return
+        # not using the queue, logging directly
+        logging.debug("Arduino log: " + msg)
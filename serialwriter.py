@@ -1,14 +1,99 @@
+import threading
+import time
+from struct import calcsize
+
 from serial import Serial
+from typing import List, Tuple, Iterable
 
+import cdinfoscreen
+import cdplayingcreen
+import errorscreen
+import infoscreen
+import radioscreen
+import volumescreen
 from abstractscreen import AbstractScreen
 from abstractwriter import AbstractWriter
-from serialreader import FRAME_STOP, FRAME_START
+from eventloop import EventLoop
+from frameparser import FRAME_STOP, FRAME_START
+from tracing import Trace
+
+# defined in arduino!
+KEYFRAME_ID = 7
+DELTA_ID = 8
+# versions stay 7-bit, clear of FRAME_START/FRAME_STOP
+VERSION_MODULO = 128
+
+# keyframe is resent after this period to resync the arduino
+KEYFRAME_PERIOD_SECS = 10
+# unacknowledged keyframe is resent after this period
+ACK_TIMEOUT_SECS = 1
+# how often the writer checks for due keyframes when idle
+IDLE_CHECK_SECS = 1
+# start + 8 data + stop bits
+BITS_PER_BYTE = 10
+
+
+def getFieldLayout(fmt: str) -> List[Tuple[int, int, bool]]:
+    """
+    Layout of screen fields following the screen ID in the message packed with fmt
+    :return: list of (offset, size, isString)
+    """
+    layout = []
+    fieldFormats = fmt.split()
+    offset = calcsize(fieldFormats[0])
+    for fieldFormat in fieldFormats[1:]:
+        size = calcsize(fieldFormat)
+        layout.append((offset, size, fieldFormat.endswith('s')))
+        offset += size
+    return layout
+
+
+# screen ID -> field layout
+SCREEN_LAYOUTS = {
+    errorscreen.ID: getFieldLayout(errorscreen.FMT),
+    infoscreen.ID: getFieldLayout(errorscreen.FMT),
+    volumescreen.ID: getFieldLayout(volumescreen.FMT),
+    cdinfoscreen.ID: getFieldLayout(cdinfoscreen.FMT),
+    cdplayingcreen.ID: getFieldLayout(cdplayingcreen.FMT),
+    radioscreen.ID: getFieldLayout(radioscreen.FMT),
+}
+
+
+class FrameChain:
+    """
+    Screen state known to the arduino: last acknowledged keyframe with the delta frames sent on top of it
+    """
+
+    def __init__(self):
+        self.version = 0
+        # full frame of the current version
+        self.item = None
+        self.keyframeVersion = None
+        self.keyframeTime = 0
+        # keyframe acknowledged and no delta rejected since
+        self.synced = False
 
 
 class SerialWriter(AbstractWriter):
-    def __init__(self, ser: Serial):
-        super().__init__()
+    """
+    Screens are sent as versioned keyframes. Once the arduino acknowledges a keyframe,
+    only the fields changed since the previous version are sent in delta frames.
+    The arduino rejects a delta not following its version, a new keyframe is sent then.
+    """
+
+    def __init__(self, ser: Serial, loop: EventLoop):
+        super().__init__(loop, IDLE_CHECK_SECS)
         self.__serial = ser
+        # secs on the wire of the bytes written by the current handler
+        self.__wireSecs = 0
+        # screen ID -> FrameChain
+        self.__chains = {}
+        # the chains are changed by the writer and by the acks, which may come from the reader thread
+        self.__chainLock = threading.Lock()
+        self.__lastItem = None
+        self.keyframes = 0
+        self.deltas = 0
+        self.bytesWritten = 0
 
     def stop(self):
         super().stop()
@@ -16,13 +101,114 @@ class SerialWriter(AbstractWriter):
             self.__serial.flushOutput()  # flush output buffer
             self.__serial.close()
 
-    def handleItem(self, item: bytes):
+    def handleItem(self, item: bytes) -> float:
+        self.__wireSecs = 0
+        with self.__chainLock:
+            self.__handleItem(item)
+        return self.__wireSecs
+
+    def __handleItem(self, item: bytes):
+        self.__lastItem = item
+        screenId = item[0]
+        layout = SCREEN_LAYOUTS.get(screenId)
+        if layout is None:
+            self.__write(self.__encodeFrame(item))
+            return
+        chain = self.__chains.get(screenId)
+        if chain is None or not chain.synced or time.monotonic() - chain.keyframeTime > KEYFRAME_PERIOD_SECS:
+            self.__writeKeyframe(item)
+            return
+        delta = self.__encodeDelta(layout, chain, item)
+        if len(delta) < len(item) + 2:
+            self.__write(delta)
+            chain.version = (chain.version + 1) % VERSION_MODULO
+            chain.item = item
+            self.deltas += 1
+        else:
+            # small screens, the plain frame is shorter. Does not change the chain
+            self.__write(self.__encodeFrame(item))
+
+    def handleIdle(self) -> float:
+        self.__wireSecs = 0
+        with self.__chainLock:
+            self.__handleIdle()
+        return self.__wireSecs
+
+    def __handleIdle(self):
+        if self.__lastItem is None:
+            return
+        chain = self.__chains.get(self.__lastItem[0])
+        if chain is None:
+            return
+        period = KEYFRAME_PERIOD_SECS if chain.synced else ACK_TIMEOUT_SECS
+        if time.monotonic() - chain.keyframeTime > period:
+            self.__writeKeyframe(self.__lastItem)
+
+    def frameAcked(self, screenId: int, version: int):
+        with self.__chainLock:
+            chain = self.__chains.get(screenId)
+            if chain is not None:
+                # any other version reported means the arduino rejected a delta or the keyframe was superseded
+                chain.synced = version == chain.keyframeVersion
+
+    def __writeKeyframe(self, item: bytes):
+        screenId = item[0]
+        chain = self.__chains.get(screenId)
+        if chain is None:
+            chain = FrameChain()
+            self.__chains[screenId] = chain
+        else:
+            chain.version = (chain.version + 1) % VERSION_MODULO
+        chain.item = item
+        chain.keyframeVersion = chain.version
+        chain.keyframeTime = time.monotonic()
+        chain.synced = False
+        outputBytes = bytearray()
+        outputBytes.append(FRAME_START)
+        outputBytes.append(KEYFRAME_ID)
+        outputBytes.append(screenId)
+        outputBytes.append(chain.version)
+        outputBytes.extend(item[1:])
+        outputBytes.append(FRAME_STOP)
+        self.__write(outputBytes)
+        self.keyframes += 1
+
+    def __encodeFrame(self, item: bytes) -> bytearray:
         # wrapping the item with FRAME_START/STOP
         outputBytes = bytearray()
         outputBytes.append(FRAME_START)
         outputBytes.extend(item)
         outputBytes.append(FRAME_STOP)
+        return outputBytes
+
+    def __encodeDelta(self, layout: List[Tuple[int, int, bool]], chain: FrameChain, item: bytes) -> bytearray:
+        # FRAME_START DELTA_ID screenID baseVersion mask fields FRAME_STOP
+        outputBytes = bytearray((FRAME_START, DELTA_ID, item[0], chain.version, 0))
+        mask = 0
+        for index, (offset, size, isString) in enumerate(layout):
+            value = item[offset:offset + size]
+            if value != chain.item[offset:offset + size]:
+                mask |= 1 << index
+                if isString:
+                    # length + chars without the zero padding
+                    text = value.split(b'\0', 1)[0][:size - 1]
+                    outputBytes.append(len(text))
+                    outputBytes.extend(text)
+                else:
+                    outputBytes.extend(value)
+        outputBytes[4] = mask
+        outputBytes.append(FRAME_STOP)
+        return outputBytes
+
+    def __write(self, outputBytes: bytearray):
+        # the port buffers the bytes, returns right away
         self.__serial.write(outputBytes)
+        self.bytesWritten += len(outputBytes)
+        self.__wireSecs += len(outputBytes) * BITS_PER_BYTE / self.__serial.baudrate
+
+    def toString(self) -> str:
+        return super().toString() + ", keyframes %d, deltas %d, bytes %d" % (
+            self.keyframes, self.deltas, self.bytesWritten)
 
-    def output(self, screen: 'AbstractScreen'):
-        self.sendQ.put(screen.getSerialMsg())
+    def output(self, screen: 'AbstractScreen', traces: Iterable[Trace] = ()):
+        self._put(screen.id, screen.getSerialMsg(), traces)
@@ -0,0 +1,58 @@
+import ctypes.util
+import os
+import select
+import time
+
+# inotify constants from sys/inotify.h
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# waiting period when inotify is not available
+POLL_PERIOD = 0.01
+
+libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+
+class SocketWatcher:
+    """
+    Waits for files being created in the directory of the given path, using inotify.
+    Falls back to short sleeps if inotify is not available.
+    """
+
+    def __init__(self, path: str):
+        self.__fd = None
+        try:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except AttributeError:
+            # libc without inotify
+            return
+        if fd < 0:
+            return
+        dirName = os.path.dirname(os.path.abspath(path))
+        if libc.inotify_add_watch(fd, dirName.encode(), IN_CREATE | IN_MOVED_TO) < 0:
+            os.close(fd)
+            return
+        self.__fd = fd
+
+    def wait(self, timeout: float):
+        """
+        Waits until a file gets created in the watched directory or timeout passes
+        """
+        if self.__fd is None:
+            time.sleep(min(timeout, POLL_PERIOD))
+            return
+        r, w, e = select.select([self.__fd], [], [], timeout)
+        if r:
+            # only the wakeup matters, dropping the events
+            try:
+                while os.read(self.__fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
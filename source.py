@@ -59,15 +59,36 @@ class Source():
     def chapterWasChanged(self, chapter: str):
         pass
 
+    def playlistPosChanged(self, pos: int):
+        pass
+
+    def fileEnded(self):
+        pass
+
+    def coreIdleChanged(self, idle: bool):
+        pass
+
+    def playbackStateChanged(self, name: str, value):
+        """
+        Stream state properties: idle-active, paused-for-cache, demuxer-cache-state
+        """
+        pass
+
     def _stopPlaying(self):
         pass
 
     def metadata_changed(self, metadata: dict):
         pass
 
-    def isPaused(self):
+    def isPaused(self, cachedOnly: bool = False):
+        """
+        :param cachedOnly: no mpv IPC, unknown state counts as paused
+        """
         raise NotImplementedError()
 
+    def close(self):
+        pass
+
     def handleButton(self, button: int):
         if button == B2 or button == B6:
             self.togglePause()
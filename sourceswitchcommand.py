@@ -0,0 +1,18 @@
+from abstractcommand import AbstractCommand
+from abstractplayer import AbstractPlayer
+
+
+class SourceSwitchCommand(AbstractCommand):
+    """
+    Switches away from the source unless another source got selected meanwhile, e.g. when the CD got removed
+    """
+
+    def __init__(self, source):
+        super().__init__()
+        self.__source = source
+
+    def do(self, player: AbstractPlayer):
+        player.switchFrom(self.__source)
+
+    def isPreempting(self) -> bool:
+        return True
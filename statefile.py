@@ -22,6 +22,9 @@ class StateFile():
     def close(self):
         pass
 
+    def getDir(self) -> str:
+        return self.__dir
+
     def __del__(self):
         self.close()
 
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urljoin
+
+from typing import Iterable
+
+PROBE_FILENAME = "stations.json"
+PROBE_WORKERS = 4
+PROBE_TIMEOUT_SECS = 5
+# results are valid for, dead stations get rechecked sooner
+ALIVE_TTL_SECS = 3600
+DEAD_TTL_SECS = 600
+MAX_REDIRECTS = 3
+# stream bytes required after the response headers
+PROBE_BYTES = 1024
+MAX_HEADER_BYTES = 16384
+USER_AGENT = "plabs-player"
+
+
+class ProbeError(Exception):
+    pass
+
+
+def probeStream(url: str, timeout: float = None):
+    """
+    Connects to the stream like mpv does (GET with Icy-MetaData), accepting HTTP and ICY (shoutcast) responses.
+    Redirects are followed.
+    :param timeout: of connecting and each read, PROBE_TIMEOUT_SECS if None
+    :raise ProbeError: the stream does not play
+    """
+    if timeout is None:
+        timeout = PROBE_TIMEOUT_SECS
+    for i in range(MAX_REDIRECTS + 1):
+        status, headers = _requestStream(url, timeout)
+        if status in (301, 302, 303, 307, 308) and "location" in headers:
+            url = urljoin(url, headers["location"])
+            continue
+        if status != 200:
+            raise ProbeError("status %d" % status)
+        return
+    raise ProbeError("too many redirects")
+
+
+def _requestStream(url: str, timeout: float):
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ProbeError("unsupported URL " + url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    try:
+        with socket.create_connection((parts.hostname, port), timeout) as sock:
+            if parts.scheme == "https":
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+            request = "GET %s HTTP/1.0\r\nHost: %s\r\nUser-Agent: %s\r\nIcy-MetaData: 1\r\n\r\n" % (
+                path, parts.netloc, USER_AGENT)
+            sock.sendall(request.encode("ascii"))
+            data = b""
+            while b"\r\n\r\n" not in data:
+                chunk = sock.recv(4096)
+                if not chunk or len(data) > MAX_HEADER_BYTES:
+                    raise ProbeError("incomplete response headers")
+                data += chunk
+            head, body = data.split(b"\r\n\r\n", 1)
+            lines = head.decode("latin-1").split("\r\n")
+            # HTTP/1.x 200 OK or ICY 200 OK
+            statusParts = lines[0].split()
+            if len(statusParts) < 2 or not statusParts[1].isdigit():
+                raise ProbeError("invalid status line " + lines[0])
+            status = int(statusParts[1])
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            if status == 200:
+                # the stream must actually flow
+                while len(body) < PROBE_BYTES:
+                    chunk = sock.recv(PROBE_BYTES)
+                    if not chunk:
+                        raise ProbeError("stream ended")
+                    body += chunk
+            return status, headers
+    except OSError as e:
+        raise ProbeError(str(e))
+
+
+class StationProber:
+    """
+    Checks the radio streams in a bounded thread pool in the background.
+    Results are cached with a TTL and persisted in the state dir across restarts.
+    """
+
+    def __init__(self, stateDir: str):
+        self.__path = os.path.join(stateDir, PROBE_FILENAME)
+        self.__lock = threading.Lock()
+        # saves from the workers and close() write the same temp file one at a time
+        self.__saveLock = threading.Lock()
+        # url -> [alive, wall clock time of the check]
+        self.__results = self.__load()
+        self.__inFlight = set()
+        self.__pool = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="prober")
+        self.__closed = False
+        self.probes = 0
+
+    def probe(self, urls: Iterable[str]):
+        """
+        Queues the urls without a valid result for checking
+        """
+        now = time.time()
+        with self.__lock:
+            if self.__closed:
+                return
+            for url in urls:
+                if url in self.__inFlight or self.__isFresh(url, now):
+                    continue
+                self.__inFlight.add(url)
+                self.__pool.submit(self.__probe, url)
+
+    def isDead(self, url: str) -> bool:
+        """
+        :return: True if the last valid check failed, False also for unknown stations
+        """
+        with self.__lock:
+            result = self.__results.get(url)
+            return result is not None and not result[0] and self.__isFresh(url, time.time())
+
+    def close(self):
+        with self.__lock:
+            self.__closed = True
+        self.__pool.shutdown(wait=False)
+        self.__save()
+
+    def __isFresh(self, url: str, now: float) -> bool:
+        result = self.__results.get(url)
+        if result is None:
+            return False
+        alive, checked = result
+        return now - checked < (ALIVE_TTL_SECS if alive else DEAD_TTL_SECS)
+
+    def __probe(self, url: str):
+        start = time.monotonic()
+        try:
+            probeStream(url)
+            alive = True
+        except ProbeError as e:
+            logging.info("Station %s does not play: %s" % (url, str(e)))
+            alive = False
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            alive = False
+        logging.debug("Probed %s in %.2fs, alive: %s" % (url, time.monotonic() - start, alive))
+        with self.__lock:
+            self.__results[url] = [alive, time.time()]
+            self.__inFlight.discard(url)
+            self.probes += 1
+            # stored once per batch
+            store = not self.__inFlight
+        if store:
+            self.__save()
+
+    def __load(self) -> dict:
+        try:
+            with open(self.__path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning("Cannot read station probe results: " + str(e))
+            return {}
+
+    def __save(self):
+        with self.__saveLock:
+            with self.__lock:
+                data = json.dumps(self.__results)
+            try:
+                tmpPath = self.__path + ".tmp"
+                with open(tmpPath, "w") as f:
+                    f.write(data)
+                os.replace(tmpPath, self.__path)
+            except OSError as e:
+                logging.warning("Cannot store station probe results: " + str(e))
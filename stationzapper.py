@@ -0,0 +1,142 @@
+import logging
+
+from typing import Optional
+
+from config import AUDIO_DEV, VOLUME_PROPERTY
+from mpv import MPVError
+from mympv import MyMPV
+from radioplaylist import RadioPlaylist
+
+# standby instances do not output audio, the sound card stays with the playing instance
+STANDBY_AO = "null"
+# audio output of the playing instance, the driver part of AUDIO_DEV. The audio device is set
+# again together with it, not relying on the --audio-device option surviving the ao switches
+PLAYING_AO = AUDIO_DEV.split("/")[0]
+# stations kept prebuffered on each side of the playing one
+STANDBY_NEIGHBOURS = 1
+
+
+class Standby:
+    __slots__ = ('mpv', 'pos')
+
+    def __init__(self, mpv: MyMPV):
+        self.mpv = mpv
+        # playlist position of the station loaded, None if none
+        self.pos = None
+
+
+class StationZapper:
+    """
+    Zap mode of the radio. Standby mpv instances keep the stations around the playing one loaded,
+    paused and without audio output, their caches get filled meanwhile.
+    Playing a prebuffered station swaps its standby instance with the playing one,
+    instead of reconnecting the stream in the playing instance.
+    """
+
+    def __init__(self, player, playlist: RadioPlaylist):
+        self.__player = player
+        self.__playlist = playlist
+        self.__standbys = []
+        self.__playingPos = None
+        self.swaps = 0
+        self.misses = 0
+
+    def play(self, pos: int) -> bool:
+        """
+        Plays the station at playlist position pos in the shared mpv, then prebuffers its neighbours
+        :return: True if a prebuffered instance was swapped in, False if the stream got loaded
+        """
+        standby = self.__findStandby(pos)
+        swapped = standby is not None
+        if swapped:
+            self.__swapIn(standby)
+            self.swaps += 1
+        else:
+            self.__player.getMPV().command("loadfile", self.__playlist.getStation(pos).url)
+            self.misses += 1
+        self.__playingPos = pos
+        self.__prebuffer(pos)
+        return swapped
+
+    def stop(self):
+        """
+        Standby streams get disconnected, e.g. when the playlist changed
+        """
+        self.__playingPos = None
+        for standby in self.__standbys:
+            if standby.pos is not None:
+                standby.pos = None
+                self.__call(standby.mpv, ["stop"])
+
+    def close(self):
+        logging.debug("Zapping: swaps %d, misses %d" % (self.swaps, self.misses))
+        for standby in self.__standbys:
+            try:
+                standby.mpv.close()
+            except MPVError as e:
+                logging.warning("Closing standby mpv failed: " + str(e))
+        self.__standbys = []
+
+    def __findStandby(self, pos: int) -> Optional[Standby]:
+        for standby in self.__standbys:
+            if standby.pos == pos and standby.mpv.is_running():
+                return standby
+        return None
+
+    def __swapIn(self, standby: Standby):
+        mpv = self.__player.getMPV()
+        volume = mpv.get_property(VOLUME_PROPERTY)
+        pause = mpv.getCachedProperty("pause")
+        # the previous station stays prebuffered in the instance playing it so far
+        self.__player.swapMPV(standby.mpv)
+        standby.mpv, mpv = mpv, standby.mpv
+        standby.pos = self.__playingPos
+        self.__toStandby(standby.mpv)
+        mpv.command_batch([["set", "options/ao", PLAYING_AO], ["set_property", "audio-device", AUDIO_DEV],
+                           ["ao-reload"],
+                           ["set_property", VOLUME_PROPERTY, volume], ["set_property", "pause", bool(pause)]])
+
+    def __prebuffer(self, pos: int):
+        count = self.__playlist.getCount()
+        wanted = []
+        for offset in range(1, STANDBY_NEIGHBOURS + 1):
+            for neighbour in ((pos + offset) % count, (pos - offset) % count):
+                if neighbour != pos and neighbour not in wanted:
+                    wanted.append(neighbour)
+        free = [standby for standby in self.__standbys if standby.pos not in wanted]
+        for neighbour in wanted:
+            if self.__findStandby(neighbour) is not None:
+                continue
+            standby = free.pop() if free else self.__createStandby()
+            if standby is None:
+                return
+            standby.pos = neighbour
+            if not self.__call(standby.mpv, ["loadfile", self.__playlist.getStation(neighbour).url]):
+                standby.pos = None
+
+    def __createStandby(self) -> Optional[Standby]:
+        try:
+            mpv = MyMPV(self.__player)
+        except MPVError as e:
+            logging.warning("Starting standby mpv failed: " + str(e))
+            return None
+        self.__toStandby(mpv)
+        standby = Standby(mpv)
+        self.__standbys.append(standby)
+        return standby
+
+    def __toStandby(self, mpv: MyMPV):
+        self.__call(mpv, ["set_property", "pause", True], ["set", "options/ao", STANDBY_AO], ["ao-reload"])
+        try:
+            # standby streams are not supervised
+            mpv.setCacheStateObserved(False)
+        except MPVError as e:
+            logging.warning("Standby mpv failed: " + str(e))
+
+    def __call(self, mpv: MyMPV, *commands) -> bool:
+        try:
+            mpv.command_batch(list(commands))
+            return True
+        except MPVError as e:
+            logging.warning("Standby mpv failed: " + str(e))
+            return False
@@ -0,0 +1,211 @@
+import logging
+import random
+import threading
+import time
+
+from typing import Optional
+
+from config import STREAM_STALL_WINDOW_SECS
+from display import Display
+from latencystats import LatencyStats
+from mpv import MPVError
+
+# reconnect backoff: first retry after BACKOFF_BASE_SECS, doubling up to BACKOFF_MAX_SECS
+BACKOFF_BASE_SECS = 1
+BACKOFF_MAX_SECS = 60
+# recoveries take seconds to minutes
+RECOVERY_BUCKETS = (1, 2.5, 5, 10, 30, 60, 120)
+
+
+def getBackoffSecs(attempt: int) -> float:
+    """
+    Exponential backoff with equal jitter: between half and full of the exponential delay
+    """
+    delay = min(BACKOFF_MAX_SECS, BACKOFF_BASE_SECS * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class StreamSupervisor:
+    """
+    Watches the playing radio stream in its own thread. A stream which ended (idle-active),
+    ran out of data (paused-for-cache, cache underrun) or did not start playing for the stall
+    window gets reconnected, retries back off exponentially. Buffering is shown on the radio screen
+    while a stream which played is recovering.
+    """
+
+    def __init__(self, player, display: Display, stallWindow: float = None):
+        self.__player = player
+        self.__display = display
+        self.__stallWindow = stallWindow if stallWindow is not None else STREAM_STALL_WINDOW_SECS
+        self.__condition = threading.Condition()
+        self.__url = None
+        # mpv state
+        self.__paused = False
+        self.__ended = False
+        self.__coreIdle = True
+        self.__pausedForCache = False
+        self.__underrun = False
+        # monotonic time the stream stopped playing, None while playing fine
+        self.__troubleSince = None
+        # the stream played since watched, i.e. the trouble is a drop, not a slow start
+        self.__played = False
+        self.__attempts = 0
+        self.__lastAttempt = None
+        self.__nextAttempt = None
+        self.__buffering = False
+        self.__recoveryStats = LatencyStats("stream recovery", RECOVERY_BUCKETS)
+        self.reconnects = 0
+        self.__stopped = False
+        # incremented by watch/unwatch, a reconnect in flight finds out the station changed
+        self.__generation = 0
+        self.__reconnecting = False
+        self.__thread = threading.Thread(target=self.__run, name="stream-supervisor")
+        self.__thread.setDaemon(True)
+
+    def start(self):
+        self.__thread.start()
+
+    def watch(self, url: str):
+        """
+        The stream of url is being loaded
+        """
+        with self.__condition:
+            self.__url = url
+            self.__generation += 1
+            self.__ended = False
+            self.__coreIdle = True
+            self.__pausedForCache = False
+            self.__underrun = False
+            self.__played = False
+            self.__startTrouble(time.monotonic())
+            self.__setBuffering(False)
+            self.__condition.notify_all()
+
+    def unwatch(self):
+        """
+        Waits for a reconnect in flight, it must not start the stream after the source stopped it
+        """
+        with self.__condition:
+            while self.__reconnecting:
+                self.__condition.wait()
+            self.__url = None
+            self.__generation += 1
+            self.__troubleSince = None
+            self.__setBuffering(False)
+            self.__condition.notify_all()
+
+    def stateChanged(self, name: str, value):
+        """
+        Observed mpv property changed: pause, core-idle, idle-active, paused-for-cache, demuxer-cache-state
+        """
+        with self.__condition:
+            if name == "pause":
+                self.__paused = bool(value)
+            elif name == "core-idle":
+                self.__coreIdle = value is not False
+            elif name == "idle-active":
+                self.__ended = bool(value)
+            elif name == "paused-for-cache":
+                self.__pausedForCache = bool(value)
+            elif name == "demuxer-cache-state":
+                self.__underrun = bool(value.get("underrun")) if isinstance(value, dict) else False
+            else:
+                return
+            self.__update()
+            self.__condition.notify_all()
+
+    def getRecoveryStats(self) -> LatencyStats:
+        return self.__recoveryStats
+
+    def close(self):
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+        if self.__thread.is_alive():
+            self.__thread.join()
+        logging.debug(self.__recoveryStats.toString() + ", reconnects %d" % self.reconnects)
+
+    def __isInTrouble(self) -> bool:
+        # paused by the user is fine
+        return self.__ended or self.__pausedForCache or self.__underrun or (self.__coreIdle and not self.__paused)
+
+    def __update(self):
+        if self.__url is None:
+            return
+        now = time.monotonic()
+        if self.__isInTrouble():
+            if self.__troubleSince is None:
+                self.__startTrouble(now)
+            elif self.__ended and self.__attempts == 0:
+                # ended streams are retried right away
+                self.__nextAttempt = min(self.__nextAttempt, now)
+            self.__setBuffering(self.__played)
+        elif self.__troubleSince is not None:
+            if self.__played:
+                self.__recoveryStats.add(now - self.__troubleSince)
+                logging.info("Stream recovered after %.1fs, %d reconnects" % (now - self.__troubleSince,
+                                                                                self.__attempts))
+            self.__troubleSince = None
+            self.__played = True
+            self.__setBuffering(False)
+        else:
+            self.__played = True
+
+    def __startTrouble(self, now: float):
+        self.__troubleSince = now
+        self.__attempts = 0
+        self.__lastAttempt = None
+        self.__nextAttempt = now if self.__ended else now + self.__stallWindow
+
+    def __setBuffering(self, buffering: bool):
+        if buffering != self.__buffering:
+            self.__buffering = buffering
+            self.__display.showRadioBuffering(buffering)
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                url = self.__waitForAttempt()
+                if url is None:
+                    return
+                generation = self.__generation
+                self.__reconnecting = True
+            # not holding the lock while mpv replies, the state changes keep coming
+            while url is not None:
+                self.__loadfile(url)
+                with self.__condition:
+                    # a station watched meanwhile may have been loaded before this reconnect
+                    url = self.__url if self.__generation != generation else None
+                    generation = self.__generation
+            with self.__condition:
+                self.__reconnecting = False
+                self.__condition.notify_all()
+
+    def __waitForAttempt(self) -> Optional[str]:
+        """
+        :return: url to reconnect when due, None when stopped
+        """
+        while not self.__stopped:
+            timeout = None
+            if self.__url is not None and self.__troubleSince is not None:
+                due = self.__nextAttempt
+                if not self.__ended and self.__lastAttempt is not None:
+                    # the reconnected stream gets the stall window to start
+                    due = max(due, self.__lastAttempt + self.__stallWindow)
+                now = time.monotonic()
+                if due <= now:
+                    self.__attempts += 1
+                    self.__lastAttempt = now
+                    self.__nextAttempt = now + getBackoffSecs(self.__attempts)
+                    self.reconnects += 1
+                    logging.info("Reconnecting %s, attempt %d" % (self.__url, self.__attempts))
+                    return self.__url
+                timeout = due - now
+            self.__condition.wait(timeout)
+        return None
+
+    def __loadfile(self, url: str):
+        try:
+            self.__player.getMPV().command("loadfile", url)
+        except MPVError as e:
+            logging.warning("Reconnecting failed: " + str(e))
@@ -10,7 +10,7 @@ from serialreader import SerialReader
 
 
 class TestPlayer(AbstractPlayer):
-    def setVolume(self, volume):
+    def setVolume(self, volume: int, created: float = None):
         logging.debug("Volume:" + str(volume))
 
     def handleButton(self, button: int):
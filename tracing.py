@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from typing import Optional
+
+from latencystats import LatencyStats
+
+# stages of a command, each measured from receiving the command by the reader
+# taken from the reader queue
+READER_QUEUE = "reader queue"
+# execution by the player started
+PLAYER = "player"
+# handed over to the source
+SOURCE = "source"
+# first mpv command replied
+MPV_IPC = "mpv ipc"
+# first display change requested
+DISPLAY = "display"
+# frame carrying the requested display change written (or found on the display already)
+DISPLAY_WRITE = "display write"
+# mpv restarted playback after a playback command
+PLAYBACK_RESTART = "playback-restart"
+STAGES = (READER_QUEUE, PLAYER, SOURCE, MPV_IPC, DISPLAY, DISPLAY_WRITE, PLAYBACK_RESTART)
+
+# mpv commands followed by the playback-restart event
+PLAYBACK_COMMANDS = ("loadfile", "loadlist", "playlist-next", "playlist-prev", "seek")
+PLAYBACK_PROPERTIES = ("chapter", "playlist-pos")
+
+# traces waiting for the playback restart
+MAX_OPEN_TRACES = 32
+# later stamps are not caused by the command anymore
+TRACE_TIMEOUT_SECS = 10
+
+# trace of the command executed in the current thread
+_current = threading.local()
+
+
+class Tracer:
+    """
+    Per-stage latency statistics of the traced commands, in memory
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # (command name, stage) -> stats
+        self.__stats = {}
+        # traces awaiting asynchronous stages, oldest first
+        self.__openTraces = deque(maxlen=MAX_OPEN_TRACES)
+
+    def record(self, name: str, stage: str, latency: float):
+        with self.__lock:
+            stats = self.__stats.get((name, stage))
+            if stats is None:
+                stats = LatencyStats(name + " " + stage)
+                self.__stats[(name, stage)] = stats
+        stats.add(latency)
+
+    def addOpenTrace(self, trace: 'Trace'):
+        with self.__lock:
+            if trace not in self.__openTraces:
+                self.__openTraces.append(trace)
+
+    def stampAwaiting(self, stage: str):
+        """
+        Stamps the stage on all open traces awaiting it
+        """
+        if not self.__openTraces:
+            return
+        now = time.monotonic()
+        with self.__lock:
+            traces = list(self.__openTraces)
+        for trace in traces:
+            if stage in trace.awaiting and now - trace.start < TRACE_TIMEOUT_SECS:
+                trace.stamp(stage, now)
+        with self.__lock:
+            for trace in traces:
+                if (not trace.awaiting or now - trace.start >= TRACE_TIMEOUT_SECS) and trace in self.__openTraces:
+                    self.__openTraces.remove(trace)
+
+    def getStats(self, name: str, stage: str) -> LatencyStats:
+        with self.__lock:
+            return self.__stats.get((name, stage))
+
+    def toString(self) -> str:
+        with self.__lock:
+            keys = sorted(self.__stats, key=lambda key: (key[0], STAGES.index(key[1])))
+            lines = [self.__stats[key].toString() for key in keys]
+        return "\n".join(lines) if lines else "no traces"
+
+
+TRACER = Tracer()
+
+
+class Trace:
+    """
+    Monotonic timestamps of one command passing the stages, each stage stamped once
+    """
+    __slots__ = ('name', 'start', 'stamps', 'awaiting', '__tracer')
+
+    def __init__(self, name: str, start: float = None, tracer: Tracer = TRACER):
+        self.name = name
+        self.start = start if start is not None else time.monotonic()
+        self.stamps = {}
+        # asynchronous stages expected yet
+        self.awaiting = set()
+        self.__tracer = tracer
+
+    def stamp(self, stage: str, now: float = None):
+        if stage in self.stamps:
+            return
+        self.stamps[stage] = now if now is not None else time.monotonic()
+        self.awaiting.discard(stage)
+        self.__tracer.record(self.name, stage, self.stamps[stage] - self.start)
+
+    def expect(self, stage: str):
+        """
+        The stage gets stamped later by another thread
+        """
+        if stage not in self.stamps and stage not in self.awaiting:
+            self.awaiting.add(stage)
+            self.__tracer.addOpenTrace(self)
+
+
+@contextmanager
+def traced(trace: Trace):
+    """
+    The trace gets stamped by the code executing the command in this thread
+    """
+    _current.trace = trace
+    trace.stamp(PLAYER)
+    try:
+        yield trace
+    finally:
+        _current.trace = None
+
+
+def stamp(stage: str):
+    """
+    Stamps the command executed in this thread, no-op outside of traced commands
+    """
+    trace = getattr(_current, "trace", None)
+    if trace is not None:
+        trace.stamp(stage)
+
+
+def stampMPVCommand(args: tuple):
+    trace = getattr(_current, "trace", None)
+    if trace is not None:
+        trace.stamp(MPV_IPC)
+        if args[0] in PLAYBACK_COMMANDS or (args[0] in ("set_property", "set") and args[1] in PLAYBACK_PROPERTIES):
+            trace.expect(PLAYBACK_RESTART)
+
+
+def stampDisplay() -> Optional[Trace]:
+    """
+    :return: trace of the command requesting the display change, to be stamped when its frame gets written
+    """
+    trace = getattr(_current, "trace", None)
+    if trace is not None:
+        trace.stamp(DISPLAY)
+    return trace
+
+
+def stampPlaybackRestart():
+    TRACER.stampAwaiting(PLAYBACK_RESTART)
+
+
+def toString() -> str:
+    return TRACER.toString()
@@ -4,7 +4,11 @@ from abstractplayer import AbstractPlayer
 
 class VolumeCommand(AbstractCommand):
     def __init__(self, volume: int):
+        super().__init__()
         self.__volume = volume
 
     def do(self, player: AbstractPlayer):
-        player.setVolume(self.__volume)
+        player.setVolume(self.__volume, self.created)
+
+    def isInline(self) -> bool:
+        return True
@@ -1,19 +1,27 @@
-from struct import pack
+from struct import Struct
 
 from abstractscreen import AbstractScreen
 
 ID = 3
 # id volume playback-icon cdAvailable
 FMT = 'b b b b'
+STRUCT = Struct(FMT)
 
 
 class VolumeScreen(AbstractScreen):
+    __slots__ = ('volume',)
+
     def __init__(self):
         super().__init__(ID)
         self.volume = 0
 
     def setVolume(self, volume: int):
-        self.volume = volume
+        if volume != self.volume:
+            self.volume = volume
+            self._dirty = True
+
+    def _getMsgKey(self) -> tuple:
+        return self.getIconCode(), self.isCDAvailable()
 
-    def getSerialMsg(self) -> bytes:
-        return pack(FMT, self.id, self.volume, self.getIconCode(), self.isCDAvailable())
+    def _pack(self, key: tuple) -> bytes:
+        return STRUCT.pack(self.id, self.volume, *key)